@@ -1,11 +1,18 @@
-from typing import Annotated, TypedDict, List, Dict, Any
+from typing import Annotated, TypedDict, List, Dict, Any, Optional, Tuple, Type, Union
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, ToolMessage  # type: ignore
 from langchain_core.tools import tool # type: ignore
+from langchain_core.runnables import RunnableConfig # type: ignore
 from langgraph.graph import StateGraph, START, END  # type: ignore
+from langgraph.graph.message import add_messages # type: ignore
+from langgraph.types import Command, Send # type: ignore
 from langgraph.checkpoint.memory import MemorySaver # type: ignore
 from langchain.agents import create_agent # type: ignore
 from langchain_google_genai import ChatGoogleGenerativeAI # type: ignore
+import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
 from dotenv import load_dotenv # type: ignore
 
 # import all tools
@@ -18,25 +25,70 @@ from tools.read_file import read_file # type: ignore
 from tools.search_web import search_web # type: ignore
 from tools.terminal import run_terminal # type: ignore
 from tools.search_files import search_files # type: ignore
+from tools.read_artifact import read_artifact # type: ignore
+from tools.semantic_search import semantic_search # type: ignore
+
+from artifacts import artifact_store, is_artifact_ref # type: ignore
+from llm_client import LLMCallCancelled, RateLimitedLLM, cancel_scope, check_cancelled # type: ignore
+from schemas import ( # type: ignore
+    AgentOutput,
+    ArchitectureOutput,
+    CodeArtifact,
+    CodeOutput,
+    ResearchOutput,
+    ReviewOutput,
+    TestOutput,
+    message_text,
+    parse_output,
+)
 
 load_dotenv()
 os.environ["GOOGLE_API_KEY"] = os.getenv("GOOGLE_API_KEY", "")
 
+def latest(current: str, update: str) -> str:
+    """Reducer for stage outputs: parallel stages may write in one step, keep the newest value."""
+    return update or current
+
 # Shared state
 class AgentState(TypedDict):
-    messages: Annotated[List[BaseMessage], "add_messages"]
-    research: str
-    architecture: str
+    messages: Annotated[List[BaseMessage], add_messages]
+    research: Annotated[str, latest]
+    architecture: Annotated[str, latest]
+    code: Annotated[str, latest]
+    review: Annotated[str, latest]
+    tests: Annotated[str, latest]
+
+# Input for a stage node: the supervisor call it answers, or the artifact it checks speculatively
+class StageInput(TypedDict, total=False):
+    tool_call: Dict[str, Any]
+    artifact: str
+    base_artifact: str
     code: str
-    review: str
-    tests: str
 
-llm = ChatGoogleGenerativeAI(model="gemini-3-pro-preview", temperature=0.3)
+# Point CODEARTISAN_LLM_ENDPOINT at a local mock server to exercise the client offline
+llm_endpoint = os.getenv("CODEARTISAN_LLM_ENDPOINT")
+llm = ChatGoogleGenerativeAI(
+    model="gemini-3-pro-preview",
+    temperature=0.3,
+    # A single attempt per call: RateLimitedLLM is the only retry layer, so every
+    # provider hit goes through its buckets and it sees the 429s it adapts to
+    max_retries=1,
+    **({"client_options": {"api_endpoint": llm_endpoint}, "transport": "rest"} if llm_endpoint else {}),
+)
+
+# Shared, rate-limit-aware client for every direct LLM call made by this process
+llm_client = RateLimitedLLM(
+    llm,
+    requests_per_minute=float(os.getenv("CODEARTISAN_LLM_RPM", "60")),
+    tokens_per_minute=float(os.getenv("CODEARTISAN_LLM_TPM", "1000000")),
+    max_concurrency=int(os.getenv("CODEARTISAN_LLM_CONCURRENCY", "4")),
+    max_retries=int(os.getenv("CODEARTISAN_LLM_MAX_RETRIES", "5")),
+)
 
 # 1. Research Agent - Gathers requirements and context
 research_agent = create_agent(
     llm,
-    tools=[search_web, read_file, grep, list_dir, fetch_url_content, search_files, read_code], 
+    tools=[search_web, read_file, grep, list_dir, fetch_url_content, search_files, semantic_search, read_code], 
     system_prompt="""
     You are the Researcher Artisan, a scholarly detective uncovering the gems of coding knowledge for CodeArtisan AI. Your craft: Gather precise, up-to-date requirements, libraries, trends, and contexts to fuel flawless projects.
 
@@ -64,7 +116,7 @@ Output ONLY in JSON: {
 # 2. Architect Agent - Designs system structure
 architect_agent = create_agent(
     llm,
-    tools=[search_files, list_dir, read_file, grep, fetch_url_content, read_code],
+    tools=[search_files, semantic_search, list_dir, read_file, grep, fetch_url_content, read_code],
     system_prompt="""
     You are the Architect Artisan, the visionary blueprint master shaping robust structures in CodeArtisan AI. Your art: Design scalable architectures, file hierarchies, APIs, and data flows from requirements.
 
@@ -92,7 +144,7 @@ Output ONLY in JSON: {
 # 3. Code Writer Agent (Cursor-like) - Generates complete code
 code_writer_agent = create_agent(
     llm,
-    tools=[edit_and_reapply, read_file, read_code, list_dir, grep, search_files, run_terminal], 
+    tools=[edit_and_reapply, read_file, read_code, read_artifact, list_dir, grep, search_files, semantic_search, run_terminal], 
     system_prompt="""
     You are the CodeWriter Artisan, a virtuoso coder forging elegant, complete code in CodeArtisan AI—like Cursor but with deeper insight and autonomy. Your masterpiece: Generate FULL production code, including imports, error handling, comments, and inline tests.
 
@@ -119,7 +171,7 @@ Output ONLY formatted code blocks in JSON: {
 # 4. Reviewer Agent - Code review and improvements
 reviewer_agent = create_agent(
     llm,
-    tools=[search_files, search_web, fetch_url_content, grep, list_dir, read_file, read_code],
+    tools=[search_files, semantic_search, search_web, fetch_url_content, grep, list_dir, read_file, read_code, read_artifact],
     system_prompt="""
     You are the Reviewer Artisan, the vigilant guardian polishing code to perfection in CodeArtisan AI. Your scrutiny: Detect bugs, inefficiencies, style issues, and suggest masterful refinements.
 
@@ -147,7 +199,7 @@ Output ONLY in JSON: {
 # 5. Tester Agent - Generates and runs tests
 tester_agent = create_agent(
     llm,
-    tools=[run_terminal, grep, list_dir, read_file, read_code],  
+    tools=[run_terminal, grep, list_dir, read_file, read_code, read_artifact],  
     system_prompt="""
     You are the Tester Artisan, the unbreakable forge testing code's mettle in CodeArtisan AI. Your trial: Craft comprehensive tests, run validations, and ensure rock-solid functionality.
 
@@ -172,49 +224,149 @@ Output ONLY in JSON: {
     """
 )
 
+# Typed clients per agent payload; native structured output where the model supports it
+structured_llms = {
+    schema: llm_client.with_structured_output(schema, include_raw=True)
+    for schema in (ResearchOutput, ArchitectureOutput, CodeOutput, ReviewOutput, TestOutput)
+}
+
+def parse_reply(schema: Type[AgentOutput], raw: Optional[BaseMessage]) -> Tuple[str, Optional[AgentOutput]]:
+    """Recover a typed payload from a raw reply's tool-call args or text."""
+    raw_text = message_text(raw.content) if raw is not None else ""
+
+    # Tool-calling structured output carries the payload in the call args, not the text
+    candidates = [json.dumps(call["args"]) for call in getattr(raw, "tool_calls", None) or []]
+    if raw_text:
+        candidates.append(raw_text)
+
+    for candidate in candidates:
+        parsed = parse_output(candidate, schema)
+        if parsed is not None:
+            return raw_text, parsed
+    return raw_text or "\n".join(candidates), None
+
+def run_structured(schema: Type[AgentOutput], prompt: Union[str, List[BaseMessage]]) -> Tuple[str, Optional[AgentOutput]]:
+    """Invoke the LLM for a typed payload, repairing near-valid JSON locally instead of re-prompting."""
+    messages = [HumanMessage(content=prompt)] if isinstance(prompt, str) else prompt
+    result = structured_llms[schema].invoke(messages)
+    parsed = result.get("parsed")
+
+    text, repaired = parse_reply(schema, result.get("raw"))
+    parsed = parsed or repaired
+
+    if parsed is None:
+        return text, None
+    return parsed.model_dump_json(), parsed
+
 # Research Agent Node
-@tool
-def research_task(description: str) -> str:
+@tool(response_format="content_and_artifact")
+def research_task(description: str) -> Tuple[str, Optional[AgentOutput]]:
     """Research coding requirements and context."""
-    messages = [HumanMessage(content=f"Research: {description}")]
-    result = llm.invoke(messages)
-    return result.content
+    return run_structured(ResearchOutput, f"Research: {description}")
 
 # Architect Agent Node  
-@tool
-def architect_task(requirements: str) -> str:
+@tool(response_format="content_and_artifact")
+def architect_task(requirements: str) -> Tuple[str, Optional[AgentOutput]]:
     """Design software architecture and file structure."""
-    messages = [HumanMessage(content=f"Architecture for: {requirements}")]
-    result = llm.invoke(messages)
-    return result.content
+    return run_structured(ArchitectureOutput, f"Architecture for: {requirements}")
 
 # Code Writer Agent Node
-@tool
-def write_code(spec: str) -> str:
-    """Write complete, production-ready code from architecture spec."""
-    messages = [HumanMessage(content=f"Write code for: {spec}")]
-    result = llm.invoke(messages)
-    return result.content
+@tool(response_format="content_and_artifact")
+def write_code(spec: str, previous_artifact: str = "") -> Tuple[str, Optional[AgentOutput]]:
+    """
+    Write complete, production-ready code from architecture spec.
+
+    Files are saved to the artifact store; only the artifact reference,
+    file sizes and a diff against previous_artifact are returned.
+    """
+    content, parsed = run_structured(CodeOutput, f"Write code for: {spec}")
+    if parsed is None:
+        return content, None
+
+    ref = artifact_store.put_files(parsed.code)
+    stored = CodeArtifact(
+        thoughts=parsed.thoughts,
+        mentoring=parsed.mentoring,
+        **artifact_store.summarize(ref, previous_artifact if is_artifact_ref(previous_artifact) else None),
+    )
+    return stored.model_dump_json(), stored
+
+MAX_ARTIFACT_READS = int(os.getenv("CODEARTISAN_MAX_ARTIFACT_READS", "8"))
+artifact_reader_llm = llm_client.bind_tools([read_artifact])
+
+def read_artifact_message(tool_call: Dict[str, Any]) -> ToolMessage:
+    if tool_call["name"] != read_artifact.name:
+        return ToolMessage(content=f"Error: unknown tool {tool_call['name']}", tool_call_id=tool_call["id"])
+    try:
+        return read_artifact.invoke({**tool_call, "type": "tool_call"})
+    except Exception as e:
+        return ToolMessage(content=f"Error: {e}", tool_call_id=tool_call["id"], name=read_artifact.name)
+
+def inspect_artifact(
+    schema: Type[AgentOutput],
+    task: str,
+    artifact: str,
+    paths: Optional[List[str]] = None,
+    base_artifact: str = "",
+) -> Tuple[str, Optional[AgentOutput]]:
+    """
+    Review or test an artifact by reading it on demand.
+
+    The prompt carries only the file listing and the diff against
+    base_artifact; the model pulls the files or line ranges it needs through
+    read_artifact, so prompt size follows what it reads, not the codebase.
+    """
+    if not is_artifact_ref(artifact):
+        return run_structured(schema, f"{task}:\n{artifact}")  # Inline code passed directly
+
+    summary = artifact_store.summarize(artifact, base_artifact if is_artifact_ref(base_artifact) else None)
+    listing = "\n".join(f"- {path} ({info['lines']} lines)" for path, info in summary["files"].items())
+    focus = f"\nFocus on: {', '.join(paths)}" if paths else ""
+    diff = f"\nChanges since {base_artifact}:\n{summary['diff']}" if summary["diff"] else ""
+
+    messages: List[BaseMessage] = [HumanMessage(content=(
+        f"{task} artifact {artifact}.\nFiles:\n{listing}{focus}{diff}\n\n"
+        "Use read_artifact to read the files or line ranges you need. When done, reply with "
+        f"only a JSON object with the fields: {', '.join(schema.model_fields)}."
+    ))]
+
+    for _ in range(MAX_ARTIFACT_READS):
+        reply = artifact_reader_llm.invoke(messages)
+        messages.append(reply)
+        if not reply.tool_calls:
+            _, parsed = parse_reply(schema, reply)
+            if parsed is not None:
+                return parsed.model_dump_json(), parsed
+            break
+        messages.extend(read_artifact_message(call) for call in reply.tool_calls)
+
+    # Out of reads or unparseable answer: one typed call over what was read so far
+    messages.append(HumanMessage(content="Give your final answer now."))
+    return run_structured(schema, messages)
 
 # Reviewer Agent Node
-@tool
-def review_code(code: str) -> str:
-    """Review code and suggest improvements."""
-    messages = [HumanMessage(content=f"Review this code:\n{code}")]
-    result = llm.invoke(messages)
-    return result.content
+@tool(response_format="content_and_artifact")
+def review_code(
+    artifact: str,
+    paths: Optional[List[str]] = None,
+    base_artifact: str = "",
+) -> Tuple[str, Optional[AgentOutput]]:
+    """Review code (an artifact reference, optionally focused on some file paths) and suggest improvements."""
+    return inspect_artifact(ReviewOutput, "Review the code in", artifact, paths, base_artifact)
 
 # Tester Agent Node
-@tool
-def test_code(code: str) -> str:
-    """Write tests and validate code."""
-    messages = [HumanMessage(content=f"Test this code:\n{code}")]
-    result = llm.invoke(messages)
-    return result.content
+@tool(response_format="content_and_artifact")
+def test_code(
+    artifact: str,
+    paths: Optional[List[str]] = None,
+    base_artifact: str = "",
+) -> Tuple[str, Optional[AgentOutput]]:
+    """Write tests and validate code (an artifact reference, optionally focused on some file paths)."""
+    return inspect_artifact(TestOutput, "Write and reason through tests for the code in", artifact, paths, base_artifact)
 
 # Supervisor LLM with all agent tools
 supervisor_tools = [research_task, architect_task, write_code, review_code, test_code]
-llm_with_tools = llm.bind_tools(supervisor_tools)
+llm_with_tools = llm_client.bind_tools(supervisor_tools)
 
 supervisor = create_agent(
     llm,
@@ -250,55 +402,232 @@ def supervisor_node(state: AgentState) -> Dict[str, Any]:
     """Supervisor decides which agents to call."""
     messages = state["messages"]
     last_message = messages[-1].content
+    context = messages + [HumanMessage(content=last_message)]
+
+    # Speculative review/test results arrive through state rather than tool messages
+    if state.get("code"):
+        context.append(HumanMessage(content=(
+            f"Current code artifact: {state['code']}\n"
+            "Latest checks (JSON; each names the artifact it checked and whether it is blocking):\n"
+            f"Review: {state.get('review') or 'none'}\n"
+            f"Tests: {state.get('tests') or 'none'}"
+        )))
     
     # Bind tools and invoke
-    result = llm_with_tools.invoke(messages + [HumanMessage(content=last_message)])
-    
-    # Handle tool calls
-    if result.tool_calls:
-        tool_messages = []
-        for tool_call in result.tool_calls:
-            tool_name = tool_call["name"]
-            tool_args = tool_call["args"]
-            
-            # Find and execute tool
-            for t in supervisor_tools:
-                if t.name == tool_name:
-                    tool_result = t.invoke(tool_args)
-                    tool_messages.append(ToolMessage(
-                        content=tool_result,
-                        tool_call_id=tool_call["id"]
-                    ))
-                    break
-        
-        return {
-            "messages": [result] + tool_messages,
-            **{k: v for k, v in state.items() if k != "messages"}  # Preserve other state
-        }
-    else:
-        return {"messages": [result]}
+    result = llm_with_tools.invoke(context)
+    return {"messages": [result]}
+
+# Stage node names, keyed by the supervisor tool each one runs
+STAGE_NODES = {
+    research_task.name: "research",
+    architect_task.name: "architect",
+    write_code.name: "write_code",
+    review_code.name: "review",
+    test_code.name: "test",
+}
+
+def route_supervisor(state: AgentState):
+    """Fan out every tool call of the supervisor's last message to its stage node."""
+    last_message = state["messages"][-1]
+    if not (isinstance(last_message, AIMessage) and last_message.tool_calls):
+        return END
+    return [
+        Send(STAGE_NODES[tool_call["name"]], {"tool_call": tool_call, "code": state.get("code", "")})
+        for tool_call in last_message.tool_calls
+        if tool_call["name"] in STAGE_NODES
+    ] or END
+
+def run_stage(stage_tool, state: StageInput) -> Tuple[List[BaseMessage], Optional[AgentOutput]]:
+    """Execute a supervisor tool call; invoking with the full call yields a ToolMessage."""
+    tool_message = stage_tool.invoke({**state["tool_call"], "type": "tool_call"})
+    return [tool_message], tool_message.artifact
+
+def stage_update(messages: List[BaseMessage], payload: Optional[AgentOutput]) -> Dict[str, Any]:
+    update: Dict[str, Any] = {"messages": messages}
+    # Typed payloads populate their AgentState field directly
+    if payload is not None:
+        update[payload.state_field] = payload.state_value()
+    return update
+
+def research_node(state: StageInput) -> Dict[str, Any]:
+    return stage_update(*run_stage(research_task, state))
+
+def architect_node(state: StageInput) -> Dict[str, Any]:
+    return stage_update(*run_stage(architect_task, state))
+
+def write_code_node(state: StageInput) -> Command:
+    """Write code, then speculatively fan out review and tests on the new artifact."""
+    tool_call = state["tool_call"]
+
+    # Diff new code against the artifact already in state
+    if is_artifact_ref(state.get("code", "")):
+        tool_call = {**tool_call, "args": {"previous_artifact": state["code"], **tool_call["args"]}}
+
+    messages, payload = run_stage(write_code, {"tool_call": tool_call})
+    update = stage_update(messages, payload)
+
+    if not isinstance(payload, CodeArtifact):
+        return Command(update=update, goto="supervisor")
+    return Command(
+        update=update,
+        goto=[
+            Send(node, {"artifact": payload.artifact, "base_artifact": payload.base_artifact})
+            for node in ("review", "test")
+        ],
+    )
+
+class StageCancelled(Exception):
+    """Raised when a sibling stage reported a blocking failure first."""
+
+class BranchRace:
+    """
+    Shared cancellation between speculative stages checking the same artifact.
+
+    Whichever branch first reports a blocking failure sets the race's event;
+    the others stop waiting on their LLM call and return immediately, so the
+    supervisor can send the code back to the writer without waiting on them.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._races: Dict[Tuple[str, str], Tuple[threading.Event, int]] = {}
+
+    def enter(self, key: Tuple[str, str]) -> threading.Event:
+        with self._lock:
+            event, branches = self._races.get(key, (threading.Event(), 0))
+            self._races[key] = (event, branches + 1)
+            return event
+
+    def leave(self, key: Tuple[str, str]) -> None:
+        with self._lock:
+            event, branches = self._races[key]
+            if branches <= 1:
+                del self._races[key]
+            else:
+                self._races[key] = (event, branches - 1)
+
+branch_race = BranchRace()
+stage_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("CODEARTISAN_STAGE_WORKERS", "8")),
+    thread_name_prefix="codeartisan-stage",
+)
+
+def run_cancellable(fn, cancel_event: threading.Event, poll_interval: float = 0.05):
+    """
+    Run fn on the stage pool inside a cancel scope for cancel_event.
+
+    Once the event is set the caller returns at once, and fn's LLM calls stop
+    at their next checkpoint (before taking a slot or retrying), freeing the
+    pool worker and concurrency slot instead of spending quota on a result
+    nobody reads. The same holds when an enclosing cancel scope (the
+    server's run) is cancelled, even while fn is still queued for a worker.
+    """
+    def scoped():
+        with cancel_scope(cancel_event):
+            return fn()
+
+    future = stage_pool.submit(copy_context().run, scoped)
+    try:
+        while not future.done():
+            if cancel_event.wait(poll_interval):
+                raise StageCancelled()
+            check_cancelled()
+    except (StageCancelled, LLMCallCancelled):
+        future.cancel()  # Drop it if no worker has picked it up yet
+        raise
+    try:
+        return future.result()
+    except LLMCallCancelled:
+        if cancel_event.is_set():
+            raise StageCancelled()
+        raise  # An outer scope (e.g. the server cancelling the run) was cancelled
+
+# AgentState field written by each check stage
+CHECK_FIELDS = {review_code.name: "review", test_code.name: "tests"}
+
+def check_update(
+    stage_tool,
+    artifact: str,
+    messages: List[BaseMessage],
+    content: str,
+    payload: Optional[AgentOutput],
+    **status: Any,
+) -> Dict[str, Any]:
+    """
+    State update for a review/test result.
+
+    The full payload (score, blocking_issues, passed, ...) is stored as JSON
+    tagged with the artifact it checked. A value is written even on parse
+    failure or cancellation, so an older artifact's result is never shown
+    to the supervisor as the latest one.
+    """
+    result: Dict[str, Any] = {"artifact": artifact, **status}
+    if payload is not None:
+        result.update(payload.model_dump(), blocking=payload.is_blocking())
+    elif not status:
+        result.update(error="Result could not be parsed", raw=content[:2000])
+    return {"messages": messages, CHECK_FIELDS[stage_tool.name]: json.dumps(result)}
+
+def check_stage(stage_tool, state: StageInput, config: RunnableConfig) -> Dict[str, Any]:
+    """Run review/test either for a supervisor call or speculatively on a fresh artifact."""
+    if "tool_call" in state:
+        messages, payload = run_stage(stage_tool, state)
+        artifact = state["tool_call"]["args"].get("artifact", "")
+        return check_update(stage_tool, artifact, messages, str(messages[0].content), payload)
+
+    artifact = state["artifact"]
+    key = (config.get("configurable", {}).get("thread_id", ""), artifact)
+    blocked = branch_race.enter(key)
+    try:
+        content, payload = run_cancellable(
+            lambda: stage_tool.func(artifact=artifact, base_artifact=state.get("base_artifact", "")),
+            blocked,
+        )
+        if payload is not None and payload.is_blocking():
+            blocked.set()
+    except StageCancelled:
+        return check_update(
+            stage_tool, artifact, [], "", None,
+            cancelled=True, reason="A parallel check of this artifact reported a blocking failure",
+        )
+    finally:
+        branch_race.leave(key)
+
+    return check_update(stage_tool, artifact, [], content, payload)
+
+def review_node(state: StageInput, config: RunnableConfig) -> Dict[str, Any]:
+    return check_stage(review_code, state, config)
+
+def test_node(state: StageInput, config: RunnableConfig) -> Dict[str, Any]:
+    return check_stage(test_code, state, config)
 
 # Build graph
 checkpointer = MemorySaver()
 graph = StateGraph(AgentState)
 
-graph.add_node("supervisor", supervisor_node)
+# Deferred so it only runs once every branch fanned out in the previous step has finished
+graph.add_node("supervisor", supervisor_node, defer=True)
+graph.add_node("research", research_node)
+graph.add_node("architect", architect_node)
+graph.add_node("write_code", write_code_node, destinations=("review", "test", "supervisor"))
+graph.add_node("review", review_node)
+graph.add_node("test", test_node)
+
 graph.add_edge(START, "supervisor")
 
 # Loop until no more tool calls
-def should_continue(state: AgentState):
-    last_message = state["messages"][-1]
-    return "supervisor" if isinstance(last_message, AIMessage) and last_message.tool_calls else END
-
-graph.add_conditional_edges("supervisor", should_continue)
+graph.add_conditional_edges("supervisor", route_supervisor, [*STAGE_NODES.values(), END])
+for stage in ("research", "architect", "review", "test"):
+    graph.add_edge(stage, "supervisor")
 
 app = graph.compile(checkpointer=checkpointer)
 
 # Test
-config = {"configurable": {"thread_id": "1"}}
-result = app.invoke(
-    {"messages": [HumanMessage(content="Build a simple Flask API")]}, 
-    config
-)
-
-print(result["messages"][-1].content)
\ No newline at end of file
+if __name__ == "__main__":
+    config = {"configurable": {"thread_id": "1"}}
+    result = app.invoke(
+        {"messages": [HumanMessage(content="Build a simple Flask API")]}, 
+        config
+    )
+
+    print(result["messages"][-1].content)
\ No newline at end of file
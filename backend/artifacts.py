@@ -0,0 +1,129 @@
+import difflib
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+ARTIFACT_PREFIX = "artifact:"
+MAX_DIFF_CHARS = 4000
+DIGEST_RE = re.compile(r"[0-9a-f]{64}")
+
+
+def is_artifact_ref(value: str) -> bool:
+    return isinstance(value, str) and value.startswith(ARTIFACT_PREFIX)
+
+
+class ArtifactStore:
+    """
+    Content-addressed store for generated files on local disk.
+
+    Every blob is written once under objects/<2-char prefix>/<sha256> and
+    deduplicated by hash. A set of files is stored as a manifest blob
+    mapping paths to blob digests; its reference ("artifact:<digest>") is
+    what messages and state carry instead of the code itself.
+    """
+
+    def __init__(self, root: Union[str, Path]) -> None:
+        self.root = Path(root)
+
+    def _blob_path(self, digest: str) -> Path:
+        # Digests come from refs the model can write; never let one name a path
+        if not isinstance(digest, str) or not DIGEST_RE.fullmatch(digest):
+            raise ValueError(f"Invalid artifact digest: {digest!r}")
+        return self.root / "objects" / digest[:2] / digest
+
+    # Blobs
+    def put_blob(self, data: Union[str, bytes]) -> str:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if path.exists():
+            return digest
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file and rename so readers never see partial blobs
+        fd, tmp = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return digest
+
+    def get_blob(self, digest: str) -> bytes:
+        path = self._blob_path(digest)
+        if not path.exists():
+            raise FileNotFoundError(f"Artifact blob not found: {digest}")
+        return path.read_bytes()
+
+    # Artifacts (manifests of files)
+    def put_files(self, files: Dict[str, str]) -> str:
+        manifest = {path: self.put_blob(content) for path, content in sorted(files.items())}
+        return ARTIFACT_PREFIX + self.put_blob(json.dumps(manifest, sort_keys=True))
+
+    def manifest(self, ref: str) -> Dict[str, str]:
+        digest = ref[len(ARTIFACT_PREFIX):] if is_artifact_ref(ref) else ""
+        if not DIGEST_RE.fullmatch(digest):
+            raise ValueError(f"Not an artifact reference: {ref}")
+        return json.loads(self.get_blob(digest))
+
+    def read_file(self, ref: str, path: str) -> str:
+        manifest = self.manifest(ref)
+        if path not in manifest:
+            raise FileNotFoundError(f"File not in artifact {ref}: {path}")
+        return self.get_blob(manifest[path]).decode("utf-8")
+
+    def read_files(self, ref: str, paths: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        manifest = self.manifest(ref)
+        selected = manifest if paths is None else {p: manifest[p] for p in paths if p in manifest}
+        return {p: self.get_blob(d).decode("utf-8") for p, d in selected.items()}
+
+    def summarize(self, ref: str, base_ref: Optional[str] = None) -> Dict[str, object]:
+        """
+        Small description of an artifact: per-file digests and sizes, plus a
+        (truncated) unified diff against `base_ref` when one is given.
+        """
+        manifest = self.manifest(ref)
+        files = {}
+        for path, digest in manifest.items():
+            data = self.get_blob(digest)
+            files[path] = {
+                "digest": digest,
+                "bytes": len(data),
+                "lines": data.count(b"\n") + (0 if data.endswith(b"\n") or not data else 1),
+            }
+
+        summary: Dict[str, object] = {"artifact": ref, "files": files, "diff": ""}
+        if not base_ref or base_ref == ref:
+            return summary
+
+        try:
+            base = self.manifest(base_ref)
+        except (ValueError, FileNotFoundError):
+            return summary
+
+        diff_parts = []
+        for path in sorted(set(base) | set(manifest)):
+            if base.get(path) == manifest.get(path):
+                continue
+            old = self.get_blob(base[path]).decode("utf-8") if path in base else ""
+            new = self.get_blob(manifest[path]).decode("utf-8") if path in manifest else ""
+            diff_parts.extend(difflib.unified_diff(
+                old.splitlines(keepends=True),
+                new.splitlines(keepends=True),
+                fromfile=f"a/{path}" if path in base else "/dev/null",
+                tofile=f"b/{path}" if path in manifest else "/dev/null",
+            ))
+
+        diff = "".join(diff_parts)
+        if len(diff) > MAX_DIFF_CHARS:
+            diff = diff[:MAX_DIFF_CHARS] + "\n... (diff truncated; use read_artifact for full files)\n"
+        summary["base_artifact"] = base_ref
+        summary["diff"] = diff
+        return summary
+
+
+artifact_store = ArtifactStore(os.getenv("CODEARTISAN_ARTIFACT_DIR", ".codeartisan/artifacts"))
@@ -0,0 +1,366 @@
+import hashlib
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+# HTTP statuses worth retrying: timeouts, rate limits and transient server errors
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+OVERLOAD_STATUS = {429, 503}
+CANCEL_POLL_INTERVAL = 0.05
+
+
+class LLMCallCancelled(Exception):
+    """Raised when the caller's cancel scope is cancelled before or between LLM attempts."""
+
+
+# Cancel events of every enclosing cancel_scope; contextvars follow the call into
+# LangGraph/LangChain worker threads, so nodes and tools need no extra arguments
+_cancel_events: ContextVar[Tuple[threading.Event, ...]] = ContextVar("llm_cancel_events", default=())
+
+
+@contextmanager
+def cancel_scope(event: threading.Event) -> Iterator[None]:
+    """Make LLM calls in this context stop (raise LLMCallCancelled) once event is set."""
+    token = _cancel_events.set(_cancel_events.get() + (event,))
+    try:
+        yield
+    finally:
+        _cancel_events.reset(token)
+
+
+def check_cancelled() -> None:
+    if any(event.is_set() for event in _cancel_events.get()):
+        raise LLMCallCancelled()
+
+
+def _sleep(seconds: float) -> None:
+    """Sleep, waking early to raise if the current cancel scope gets cancelled."""
+    deadline = time.monotonic() + seconds
+    while True:
+        check_cancelled()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        time.sleep(min(remaining, CANCEL_POLL_INTERVAL))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `rate_per_minute`.
+
+    `acquire` blocks until the requested amount is available. `adjust` lets
+    callers correct an estimate after the fact; the balance may go negative,
+    which simply delays the next acquirer.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0) -> None:
+        # Oversized requests would never fit; let them through on a full bucket
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self.rate
+            _sleep(wait)
+
+    def adjust(self, delta: float) -> None:
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens - delta)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limiter driven by observed latency and errors.
+
+    The limit grows by roughly one slot per window of successful calls and
+    is halved on overload responses (429/503). Calls much slower than the
+    running baseline latency shrink it gently, so the client backs off
+    before the provider starts rejecting requests. Baselines are kept per
+    scope (one per derived runnable), since a long code generation and a
+    short routing call have very different normal latencies.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        *,
+        min_limit: int = 1,
+        initial_limit: Optional[int] = None,
+        latency_tolerance: float = 2.0,
+    ) -> None:
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = float(initial_limit or max_limit)
+        self.latency_tolerance = latency_tolerance
+        self.baseline_latency: Dict[Hashable, float] = {}
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                check_cancelled()
+                self._cond.wait(CANCEL_POLL_INTERVAL)
+            self._in_flight += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self, latency: float, scope: Hashable = None) -> None:
+        with self._cond:
+            baseline = self.baseline_latency.get(scope)
+            if baseline is None:
+                baseline = latency
+            else:
+                baseline = 0.9 * baseline + 0.1 * latency
+            self.baseline_latency[scope] = baseline
+
+            if latency > baseline * self.latency_tolerance:
+                self.limit = max(self.min_limit, self.limit * 0.9)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1.0 / max(self.limit, 1.0))
+            self._cond.notify_all()
+
+    def on_overload(self) -> None:
+        with self._cond:
+            self.limit = max(self.min_limit, self.limit / 2)
+
+
+class SingleFlight:
+    """Coalesce identical concurrent calls so only one reaches the provider."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Tuple[threading.Event, Dict[str, Any]]] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = (threading.Event(), {})
+                self._calls[key] = call
+
+        done, outcome = call
+
+        if not leader:
+            while not done.wait(CANCEL_POLL_INTERVAL):
+                check_cancelled()
+            if "error" in outcome:
+                raise outcome["error"]
+            return outcome["result"]
+
+        try:
+            outcome["result"] = fn()
+            return outcome["result"]
+        except BaseException as e:
+            outcome["error"] = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            done.set()
+
+
+def _error_chain(exc: BaseException):
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        yield exc
+        exc = exc.__cause__ or exc.__context__
+
+
+def status_code(exc: BaseException) -> Optional[int]:
+    """Best-effort HTTP status extraction from provider/SDK exceptions."""
+    for err in _error_chain(exc):
+        for attr in ("status_code", "code", "status"):
+            value = getattr(err, attr, None)
+            if isinstance(value, int):
+                return value
+        response = getattr(err, "response", None)
+        value = getattr(response, "status_code", None)
+        if isinstance(value, int):
+            return value
+
+    message = str(exc)
+    if "RESOURCE_EXHAUSTED" in message or re.search(r"\b429\b", message):
+        return 429
+    if "UNAVAILABLE" in message or re.search(r"\b503\b", message):
+        return 503
+    return None
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait, from Retry-After or a retryDelay hint."""
+    for err in _error_chain(exc):
+        headers = (
+            getattr(getattr(err, "response", None), "headers", None)
+            or getattr(err, "headers", None)
+            or {}
+        )
+        value = headers.get("Retry-After") or headers.get("retry-after")
+        if value:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                try:
+                    return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+
+    match = re.search(r"retry(?:Delay)?[^0-9]{0,20}([0-9]+(?:\.[0-9]+)?)\s*s", str(exc), re.IGNORECASE)
+    if match:
+        return float(match.group(1))
+    return None
+
+
+def estimate_tokens(messages: Any) -> int:
+    """Rough prompt size (~4 chars per token), used before the real usage is known."""
+    if isinstance(messages, str):
+        return max(1, len(messages) // 4)
+    total = 0
+    for m in messages:
+        total += len(str(getattr(m, "content", m)))
+    return max(1, total // 4)
+
+
+def _request_key(scope: int, messages: Any, kwargs: Dict[str, Any]) -> str:
+    if isinstance(messages, str):
+        parts: Any = messages
+    else:
+        parts = [
+            (
+                getattr(m, "type", type(m).__name__),
+                getattr(m, "content", m),
+                getattr(m, "tool_calls", None),
+                getattr(m, "tool_call_id", None),
+            )
+            for m in messages
+        ]
+    raw = repr((scope, parts, sorted(kwargs.items())))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class RateLimitedLLM:
+    """
+    Wrapper around a LangChain chat model (or any runnable with `invoke`).
+
+    Adds client-side request/token-per-minute limiting, retries with
+    jittered exponential backoff honouring Retry-After, adaptive
+    concurrency, and single-flighting of identical in-flight prompts.
+    Runnables derived via `bind_tools` share the same limits.
+
+    Inside a cancelled `cancel_scope` a call stops at its next checkpoint:
+    while waiting for a rate or concurrency slot, or between retries. A
+    request already sent to the provider still runs to completion.
+    """
+
+    def __init__(
+        self,
+        runnable: Any,
+        *,
+        requests_per_minute: float = 60,
+        tokens_per_minute: float = 1_000_000,
+        max_concurrency: int = 4,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ) -> None:
+        self.runnable = runnable
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.single_flight = SingleFlight()
+
+    def _derive(self, runnable: Any) -> "RateLimitedLLM":
+        derived = object.__new__(RateLimitedLLM)
+        derived.__dict__.update(self.__dict__)
+        derived.runnable = runnable
+        return derived
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "RateLimitedLLM":
+        return self._derive(self.runnable.bind_tools(tools, **kwargs))
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> "RateLimitedLLM":
+        return self._derive(self.runnable.with_structured_output(schema, **kwargs))
+
+    def invoke(self, messages: Any, **kwargs: Any) -> Any:
+        key = _request_key(id(self.runnable), messages, kwargs)
+        while True:
+            try:
+                return self.single_flight.do(key, lambda: self._invoke_with_retries(messages, **kwargs))
+            except LLMCallCancelled:
+                # Re-raises if our own scope was cancelled; otherwise the coalesced
+                # leader was, so run the call ourselves
+                check_cancelled()
+
+    def _invoke_with_retries(self, messages: Any, **kwargs: Any) -> Any:
+        attempt = 0
+        while True:
+            check_cancelled()
+            try:
+                return self._invoke_once(messages, **kwargs)
+            except Exception as e:
+                code = status_code(e)
+                if code not in RETRYABLE_STATUS or attempt >= self.max_retries:
+                    raise
+
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                hinted = retry_after(e)
+                if hinted is not None:
+                    delay = max(delay, min(hinted, self.max_delay))
+
+                attempt += 1
+                _sleep(delay)
+
+    def _invoke_once(self, messages: Any, **kwargs: Any) -> Any:
+        estimate = estimate_tokens(messages)
+        self.requests.acquire()
+        self.tokens.acquire(estimate)
+
+        self.concurrency.acquire()
+        started = time.monotonic()
+        try:
+            result = self.runnable.invoke(messages, **kwargs)
+        except Exception as e:
+            if status_code(e) in OVERLOAD_STATUS:
+                self.concurrency.on_overload()
+            raise
+        finally:
+            self.concurrency.release()
+
+        self.concurrency.on_success(time.monotonic() - started, scope=id(self.runnable))
+
+        # Reconcile the token estimate with what the provider actually billed
+        # (structured output with include_raw returns a dict; usage is on the raw message)
+        message = result.get("raw") if isinstance(result, dict) else result
+        usage = getattr(message, "usage_metadata", None) or {}
+        if usage.get("total_tokens"):
+            self.tokens.adjust(usage["total_tokens"] - estimate)
+
+        return result
@@ -0,0 +1,202 @@
+import json
+import re
+from typing import Any, ClassVar, Dict, List, Optional, Type, TypeVar
+
+from pydantic import BaseModel, Field, ValidationError, field_validator # type: ignore
+
+# Typed payloads for each agent. `state_field` names the AgentState key the
+# payload populates; `state_value` renders it for that key.
+
+class AgentOutput(BaseModel):
+    state_field: ClassVar[str] = ""
+
+    thoughts: str = Field(default="", description="CoT reasoning")
+    mentoring: str = Field(default="", description="Explanations + quizzes")
+
+    def state_value(self) -> str:
+        return str(getattr(self, self.state_field))
+
+    def is_blocking(self) -> bool:
+        """Whether this result alone means the code must go back to the writer."""
+        return False
+
+
+class ResearchOutput(AgentOutput):
+    state_field: ClassVar[str] = "research"
+
+    research: str = Field(description="Summarized findings with citations")
+    suggestions: str = Field(default="", description="Creative ideas")
+
+
+class ArchitectureOutput(AgentOutput):
+    state_field: ClassVar[str] = "architecture"
+
+    architecture: str = Field(description="Detailed blueprint (files, modules, flows)")
+    diagram: str = Field(default="", description="Text-based ASCII art if applicable")
+
+
+class CodeOutput(AgentOutput):
+    state_field: ClassVar[str] = "code"
+
+    code: Dict[str, str] = Field(description="Mapping of file path to full file contents")
+
+    def state_value(self) -> str:
+        return json.dumps(self.code)
+
+
+class CodeArtifact(AgentOutput):
+    """What messages and state carry for generated code: a store reference, not the files."""
+    state_field: ClassVar[str] = "code"
+
+    artifact: str = Field(description="Artifact store reference for the generated files")
+    files: Dict[str, Dict[str, Any]] = Field(default_factory=dict, description="Per-file digest and size")
+    base_artifact: str = Field(default="", description="Artifact the diff was taken against")
+    diff: str = Field(default="", description="Unified diff against base_artifact")
+
+    def state_value(self) -> str:
+        return self.artifact
+
+
+class ReviewOutput(AgentOutput):
+    state_field: ClassVar[str] = "review"
+
+    review: str = Field(description="Detailed report (issues, fixes)")
+    score: float = Field(default=0.0, ge=0.0, le=10.0, description="Quality score 1-10")
+    blocking_issues: List[str] = Field(
+        default_factory=list,
+        description="Issues that must be fixed before the code can ship (empty if none)",
+    )
+
+    @field_validator("score", mode="before")
+    @classmethod
+    def clamp_score(cls, value: Any) -> Any:
+        # Models sometimes answer on a 0-100 scale; keep the review rather than reject it
+        try:
+            return min(10.0, max(0.0, float(value)))
+        except (TypeError, ValueError):
+            return value
+
+    def is_blocking(self) -> bool:
+        return bool(self.blocking_issues)
+
+
+class TestOutput(AgentOutput):
+    __test__: ClassVar[bool] = False  # not a pytest test class
+    state_field: ClassVar[str] = "tests"
+
+    tests: str = Field(description="Generated test code + results")
+    coverage: str = Field(default="", description="Coverage estimate and details")
+    passed: bool = Field(default=True, description="False if any test failed")
+
+    def is_blocking(self) -> bool:
+        return not self.passed
+
+
+Output = TypeVar("Output", bound=AgentOutput)
+
+
+def message_text(content: Any) -> str:
+    """Flatten message content that may be a string or a list of content parts."""
+    if isinstance(content, str):
+        return content
+    parts = []
+    for part in content or []:
+        if isinstance(part, str):
+            parts.append(part)
+        elif isinstance(part, dict) and part.get("type") == "text":
+            parts.append(part.get("text", ""))
+    return "".join(parts)
+
+
+def repair_json(text: str) -> str:
+    """
+    Cheaply repair near-valid JSON produced by an LLM.
+
+    Handles code fences and surrounding prose, // and /* */ comments,
+    trailing commas, raw newlines/tabs inside strings, and output that was
+    truncated before its closing brackets.
+    """
+    # Only unwrap a fence around the whole reply; string values may contain fences
+    # of their own (READMEs, markdown mentoring), which the scanner below skips over
+    text = text.strip()
+    fenced = re.fullmatch(r"```(?:json)?\s*(.*?)\s*```", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+
+    start = text.find("{")
+    if start == -1:
+        return text.strip()
+    text = text[start:]
+
+    out = []
+    stack = []
+    in_string = False
+    escaped = False
+    i = 0
+    n = len(text)
+
+    while i < n:
+        ch = text[i]
+
+        if in_string:
+            if escaped:
+                escaped = False
+                out.append(ch)
+            elif ch == "\\":
+                escaped = True
+                out.append(ch)
+            elif ch == '"':
+                in_string = False
+                out.append(ch)
+            elif ch == "\n":
+                out.append("\\n")
+            elif ch == "\t":
+                out.append("\\t")
+            elif ch != "\r":
+                out.append(ch)
+            i += 1
+            continue
+
+        if ch == '"':
+            in_string = True
+            out.append(ch)
+        elif text.startswith("//", i):
+            newline = text.find("\n", i)
+            i = n if newline == -1 else newline
+            continue
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            continue
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            out.append(ch)
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            out.append(ch)
+            if not stack:
+                # Ignore any prose after the top-level object closes
+                break
+        elif ch == ",":
+            rest = text[i + 1:].lstrip()
+            if not rest.startswith(("}", "]")):
+                out.append(ch)
+        else:
+            out.append(ch)
+        i += 1
+
+    if in_string:
+        out.append('"')
+    repaired = "".join(out).rstrip().rstrip(",")
+    return repaired + "".join(reversed(stack))
+
+
+def parse_output(text: str, schema: Type[Output]) -> Optional[Output]:
+    """Validate text against an output schema, repairing it locally if needed."""
+    for candidate in (text, repair_json(text)):
+        try:
+            return schema.model_validate(json.loads(candidate))
+        except (ValueError, ValidationError):
+            continue
+    return None
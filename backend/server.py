@@ -0,0 +1,490 @@
+import asyncio
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect # type: ignore
+from pydantic import BaseModel # type: ignore
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage # type: ignore
+
+from agent import app as graph_app, checkpointer # type: ignore
+from llm_client import LLMCallCancelled, cancel_scope # type: ignore
+from schemas import message_text # type: ignore
+
+# Pool sizing: workers scale with cores, the LLM limiter in agent.py caps API usage
+MAX_WORKERS = int(os.getenv("CODEARTISAN_WORKERS", str(os.cpu_count() or 4)))
+MAX_QUEUED_RUNS = int(os.getenv("CODEARTISAN_MAX_QUEUED_RUNS", "64"))
+MAX_RUNS_PER_SESSION = int(os.getenv("CODEARTISAN_MAX_RUNS_PER_SESSION", "4"))
+# Open sessions each hold a checkpoint thread; cap them and reap idle ones
+MAX_SESSIONS = int(os.getenv("CODEARTISAN_MAX_SESSIONS", "256"))
+SESSION_IDLE_TTL = float(os.getenv("CODEARTISAN_SESSION_IDLE_TTL", "3600"))
+REAP_INTERVAL_SECONDS = 60
+RETRY_AFTER_SECONDS = 5
+
+
+class QueueFullError(Exception):
+    """Raised when a run or session cannot be admitted without exceeding a bound."""
+
+
+class RunCancelledError(Exception):
+    """Raised inside a worker when its run has been cancelled."""
+
+
+@dataclass
+class Session:
+    session_id: str
+    thread_id: str
+    pending: Deque["Run"] = field(default_factory=deque)
+    running: Optional["Run"] = None
+    last_active: float = field(default_factory=time.monotonic)
+    closed: bool = False
+
+    def is_idle(self, ttl: float) -> bool:
+        return (
+            self.running is None
+            and not self.pending
+            and time.monotonic() - self.last_active > ttl
+        )
+
+
+@dataclass
+class Run:
+    run_id: str
+    session: Session
+    message: str
+    future: asyncio.Future
+    events: Optional[asyncio.Queue] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    status: str = "queued"
+
+    @property
+    def session_id(self) -> str:
+        return self.session.session_id
+
+
+class RunScheduler:
+    """
+    Runs graphs for many sessions on a bounded worker pool.
+
+    Each session maps to its own checkpointer thread_id. Runs of one session
+    execute one at a time (so they never race on the same checkpoint), while
+    runs of different sessions execute in parallel up to MAX_WORKERS.
+    Admission is bounded globally and per session; excess work is rejected
+    so callers can back off instead of piling up memory. The number of open
+    sessions is capped too, and sessions idle for longer than the TTL are
+    closed along with their checkpoints.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_workers: int = MAX_WORKERS,
+        max_queued: int = MAX_QUEUED_RUNS,
+        max_per_session: int = MAX_RUNS_PER_SESSION,
+        max_sessions: int = MAX_SESSIONS,
+        session_idle_ttl: float = SESSION_IDLE_TTL,
+    ) -> None:
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.max_per_session = max_per_session
+        self.max_sessions = max_sessions
+        self.session_idle_ttl = session_idle_ttl
+        self.sessions: Dict[str, Session] = {}
+        self.runs: Dict[str, Run] = {}
+        self._ready: Optional[asyncio.Queue] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._workers: list = []
+        self._reaper: Optional[asyncio.Task] = None
+        self._admitted = 0
+
+    async def start(self) -> None:
+        self._ready = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="codeartisan-run",
+        )
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.max_workers)
+        ]
+        self._reaper = asyncio.create_task(self._reap_periodically())
+
+    async def stop(self) -> None:
+        for session in list(self.sessions.values()):
+            self.cancel(session.session_id)
+        tasks = self._workers + ([self._reaper] if self._reaper else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # Sessions
+    def create_session(self) -> Session:
+        if len(self.sessions) >= self.max_sessions:
+            self.reap_idle()
+        if len(self.sessions) >= self.max_sessions:
+            raise QueueFullError("Too many open sessions")
+
+        session_id = uuid.uuid4().hex
+        session = Session(session_id=session_id, thread_id=session_id)
+        self.sessions[session_id] = session
+        return session
+
+    def get_session(self, session_id: str) -> Session:
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        return session
+
+    def close_session(self, session_id: str) -> None:
+        self.cancel(session_id)
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            return
+        session.closed = True
+        # A running run still writes checkpoints until its current step ends;
+        # the worker deletes the thread once it has finished
+        if session.running is None:
+            self._delete_thread(session)
+
+    def reap_idle(self) -> int:
+        """Close sessions with no runs that have been idle past the TTL. Returns how many."""
+        idle = [s.session_id for s in self.sessions.values() if s.is_idle(self.session_idle_ttl)]
+        for session_id in idle:
+            self.close_session(session_id)
+        return len(idle)
+
+    async def _reap_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(REAP_INTERVAL_SECONDS)
+            self.reap_idle()
+
+    @staticmethod
+    def _delete_thread(session: Session) -> None:
+        # Drop the session's checkpoints so closed sessions stop holding memory
+        if hasattr(checkpointer, "delete_thread"):
+            checkpointer.delete_thread(session.thread_id)
+
+    # Runs
+    def submit(self, session_id: str, message: str, *, stream: bool = False) -> Run:
+        session = self.get_session(session_id)
+
+        if self._admitted >= self.max_queued:
+            raise QueueFullError("Server is at capacity")
+
+        in_flight = len(session.pending) + (1 if session.running else 0)
+        if in_flight >= self.max_per_session:
+            raise QueueFullError("Too many runs in flight for this session")
+
+        loop = asyncio.get_running_loop()
+        session.last_active = time.monotonic()
+        run = Run(
+            run_id=uuid.uuid4().hex,
+            session=session,
+            message=message,
+            future=loop.create_future(),
+            events=asyncio.Queue() if stream else None,
+        )
+        self.runs[run.run_id] = run
+        self._admitted += 1
+
+        if session.running is None:
+            session.running = run
+            self._ready.put_nowait(run)
+        else:
+            session.pending.append(run)
+
+        return run
+
+    def cancel(self, session_id: str) -> int:
+        """Cancel every queued and running run of a session. Returns how many were cancelled."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return 0
+
+        cancelled = 0
+        while session.pending:
+            run = session.pending.popleft()
+            self._finish(run, "cancelled", error=RunCancelledError(run.run_id))
+            cancelled += 1
+
+        if session.running and not session.running.future.done():
+            # Picked up between graph steps or at the next LLM call checkpoint
+            session.running.cancel_event.set()
+            cancelled += 1
+
+        return cancelled
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            run = await self._ready.get()
+            session = run.session
+            try:
+                if run.cancel_event.is_set() or session.closed:
+                    raise RunCancelledError(run.run_id)
+                run.status = "running"
+                output = await loop.run_in_executor(
+                    self._executor, self._execute, run, session.thread_id, loop
+                )
+                self._finish(run, "completed", result=output)
+            except RunCancelledError as e:
+                self._finish(run, "cancelled", error=e)
+            except Exception as e:
+                self._finish(run, "failed", error=e)
+            finally:
+                self._ready.task_done()
+                self._advance(session)
+
+    def _advance(self, session: Session) -> None:
+        session.running = None
+        session.last_active = time.monotonic()
+        if session.closed:
+            # Closed while this run was in flight; its checkpoints can go now
+            self._delete_thread(session)
+            return
+        if session.pending:
+            session.running = session.pending.popleft()
+            self._ready.put_nowait(session.running)
+
+    def _execute(self, run: Run, thread_id: str, loop: asyncio.AbstractEventLoop) -> str:
+        """
+        Stream the graph in a worker thread.
+
+        Cancellation is checked between graph steps and, through the run's
+        cancel scope, inside LLM calls while they wait for a rate or
+        concurrency slot or between retries. A request already sent to the
+        provider still runs to completion before the run stops.
+        """
+        config = {"configurable": {"thread_id": thread_id}}
+        output = ""
+
+        with cancel_scope(run.cancel_event):
+            try:
+                for chunk in graph_app.stream(
+                    {"messages": [HumanMessage(content=run.message)]},
+                    config,
+                    stream_mode="updates",
+                ):
+                    if run.cancel_event.is_set():
+                        raise RunCancelledError(run.run_id)
+
+                    for node, update in chunk.items():
+                        messages = (update or {}).get("messages") or []
+                        if not messages:
+                            continue
+                        output = message_text(messages[-1].content)
+                        if run.events is not None:
+                            loop.call_soon_threadsafe(
+                                run.events.put_nowait,
+                                {"type": "step", "run_id": run.run_id, "node": node, "content": output},
+                            )
+            except (RunCancelledError, LLMCallCancelled):
+                self._close_tool_calls(config, "Cancelled: the run was cancelled before this call finished")
+                raise RunCancelledError(run.run_id)
+            except Exception as e:
+                self._close_tool_calls(config, f"Failed: {e}")
+                raise
+
+        return output
+
+    @staticmethod
+    def _close_tool_calls(config: Dict[str, Any], reason: str) -> None:
+        """
+        Answer tool calls an interrupted run left without a ToolMessage.
+
+        Providers reject a history where a function call has no matching
+        response, so otherwise one cancelled or failed run would break every
+        later run of the session. Written as the supervisor, so the thread
+        ends instead of resuming the interrupted stage.
+        """
+        messages = graph_app.get_state(config).values.get("messages") or []
+        answered = {m.tool_call_id for m in messages if isinstance(m, ToolMessage)}
+        dangling = [
+            ToolMessage(content=reason, tool_call_id=call["id"], name=call["name"])
+            for m in messages if isinstance(m, AIMessage)
+            for call in m.tool_calls
+            if call["id"] not in answered
+        ]
+        if dangling:
+            graph_app.update_state(config, {"messages": dangling}, as_node="supervisor")
+
+    def _finish(
+        self,
+        run: Run,
+        status: str,
+        *,
+        result: Any = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        if run.future.done():
+            return
+
+        run.status = status
+        self._admitted -= 1
+        self.runs.pop(run.run_id, None)
+
+        if error is not None:
+            run.future.set_exception(error)
+            # Nobody may be awaiting a cancelled queued run; mark it retrieved
+            run.future.exception()
+        else:
+            run.future.set_result(result)
+
+        if run.events is not None:
+            event: Dict[str, Any] = {"type": status, "run_id": run.run_id}
+            if result is not None:
+                event["content"] = result
+            if error is not None and status == "failed":
+                event["error"] = str(error)
+            run.events.put_nowait(event)
+
+
+scheduler = RunScheduler()
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    await scheduler.start()
+    try:
+        yield
+    finally:
+        await scheduler.stop()
+
+
+server = FastAPI(title="CodeArtisan AI", lifespan=lifespan)
+
+
+class RunRequest(BaseModel):
+    message: str
+
+
+def _busy(error: QueueFullError) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=str(error),
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+    )
+
+
+def _session_or_404(session_id: str) -> Session:
+    try:
+        return scheduler.get_session(session_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Session not found: {session_id}")
+
+
+@server.post("/sessions")
+async def create_session() -> Dict[str, str]:
+    try:
+        session = scheduler.create_session()
+    except QueueFullError as e:
+        raise _busy(e)
+    return {"session_id": session.session_id, "thread_id": session.thread_id}
+
+
+@server.delete("/sessions/{session_id}")
+async def close_session(session_id: str) -> Dict[str, str]:
+    _session_or_404(session_id)
+    scheduler.close_session(session_id)
+    return {"session_id": session_id, "status": "closed"}
+
+
+@server.post("/sessions/{session_id}/runs")
+async def create_run(session_id: str, request: RunRequest) -> Dict[str, str]:
+    _session_or_404(session_id)
+    try:
+        run = scheduler.submit(session_id, request.message)
+    except QueueFullError as e:
+        raise _busy(e)
+
+    try:
+        output = await run.future
+    except RunCancelledError:
+        return {"run_id": run.run_id, "status": "cancelled", "output": ""}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {"run_id": run.run_id, "status": "completed", "output": output}
+
+
+@server.delete("/sessions/{session_id}/runs")
+async def cancel_runs(session_id: str) -> Dict[str, int | str]:
+    _session_or_404(session_id)
+    return {"session_id": session_id, "cancelled": scheduler.cancel(session_id)}
+
+
+@server.websocket("/sessions/{session_id}/ws")
+async def session_socket(websocket: WebSocket, session_id: str) -> None:
+    """
+    Stream runs over a WebSocket.
+
+    Client sends {"message": "..."} to start a run or {"type": "cancel"} to
+    cancel the session's runs. Server sends "step" events as graph nodes
+    finish, then one terminal "completed" / "cancelled" / "failed" event.
+    """
+    if session_id not in scheduler.sessions:
+        await websocket.close(code=4404)
+        return
+
+    await websocket.accept()
+    forwarders: list = []
+
+    async def forward(run: Run) -> None:
+        while True:
+            event = await run.events.get()
+            await websocket.send_json(event)
+            if event["type"] != "step":
+                return
+
+    try:
+        while True:
+            payload = await websocket.receive_json()
+
+            if payload.get("type") == "cancel":
+                scheduler.cancel(session_id)
+                continue
+
+            message = payload.get("message")
+            if not message:
+                await websocket.send_json({"type": "error", "error": "message is required"})
+                continue
+
+            try:
+                run = scheduler.submit(session_id, message, stream=True)
+            except KeyError:
+                # Session was closed or reaped while the socket stayed open
+                await websocket.close(code=4404)
+                return
+            except QueueFullError as e:
+                await websocket.send_json({
+                    "type": "rejected",
+                    "error": str(e),
+                    "retry_after": RETRY_AFTER_SECONDS,
+                })
+                continue
+
+            await websocket.send_json({"type": "queued", "run_id": run.run_id})
+            forwarders.append(asyncio.create_task(forward(run)))
+
+    except WebSocketDisconnect:
+        scheduler.cancel(session_id)
+    finally:
+        for task in forwarders:
+            task.cancel()
+
+
+if __name__ == "__main__":
+    import uvicorn # type: ignore
+
+    uvicorn.run(
+        server,
+        host=os.getenv("CODEARTISAN_HOST", "127.0.0.1"),
+        port=int(os.getenv("CODEARTISAN_PORT", "8000")),
+    )
@@ -0,0 +1,14 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Modules in backend/ import each other as top-level modules (as when run from backend/)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Importing agent builds the Gemini client and the artifact/cache stores; keep
+# them offline and out of the working tree
+_scratch = tempfile.mkdtemp(prefix="codeartisan-tests-")
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+os.environ.setdefault("CODEARTISAN_ARTIFACT_DIR", os.path.join(_scratch, "artifacts"))
+os.environ.setdefault("CODEARTISAN_CACHE_DIR", os.path.join(_scratch, "cache"))
@@ -0,0 +1,108 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+import agent
+from llm_client import LLMCallCancelled, cancel_scope, check_cancelled
+from schemas import CodeOutput
+
+
+class StubSupervisor:
+    """Asks for write_code once, then finishes; records each history it is sent."""
+
+    def __init__(self) -> None:
+        self.histories = []
+
+    def invoke(self, messages, **kwargs):
+        self.histories.append(list(messages))
+        if len(self.histories) == 1:
+            return AIMessage(content="", tool_calls=[{"name": "write_code", "args": {"spec": "app"}, "id": "call-1"}])
+        return AIMessage(content="done")
+
+
+class StubWriter:
+    def invoke(self, messages, **kwargs):
+        return {"parsed": CodeOutput(code={"app.py": "print('hi')\n"}), "raw": AIMessage(content="")}
+
+
+class StubChecker:
+    """Review fails fast with a blocking issue; tests would take test_seconds."""
+
+    def __init__(self, test_seconds: float) -> None:
+        self.test_seconds = test_seconds
+        self.test_started = threading.Event()
+        self.test_stopped = threading.Event()
+        self.test_finished = False
+
+    def invoke(self, messages, **kwargs):
+        prompt = messages[0].content
+        if prompt.startswith("Review"):
+            return AIMessage(content=json.dumps({"review": "Crashes on start", "score": 2, "blocking_issues": ["crash"]}))
+
+        self.test_started.set()
+        try:
+            deadline = time.monotonic() + self.test_seconds
+            while time.monotonic() < deadline:
+                check_cancelled()
+                time.sleep(0.01)
+            self.test_finished = True
+            return AIMessage(content=json.dumps({"tests": "all green", "passed": True}))
+        finally:
+            self.test_stopped.set()
+
+
+def test_blocking_review_cancels_the_speculative_test_branch(monkeypatch):
+    supervisor = StubSupervisor()
+    checker = StubChecker(test_seconds=3)
+    monkeypatch.setattr(agent, "llm_with_tools", supervisor)
+    monkeypatch.setattr(agent, "artifact_reader_llm", checker)
+    monkeypatch.setitem(agent.structured_llms, agent.CodeOutput, StubWriter())
+
+    started = time.monotonic()
+    state = agent.app.invoke(
+        {"messages": [HumanMessage(content="build an app")]},
+        {"configurable": {"thread_id": "race"}},
+    )
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 1.5
+    # Cancelled before it started, or stopped at its next checkpoint
+    assert not checker.test_started.is_set() or checker.test_stopped.wait(1)
+    assert not checker.test_finished
+
+    artifact = state["code"]
+    review, tests = json.loads(state["review"]), json.loads(state["tests"])
+    assert review["artifact"] == artifact and review["blocking"] is True
+    assert tests["artifact"] == artifact and tests["cancelled"] is True
+
+    # The supervisor's next call sees both results, each tagged with the artifact
+    context = supervisor.histories[-1][-1].content
+    assert f"Current code artifact: {artifact}" in context
+    assert f"Review: {state['review']}" in context
+    assert f"Tests: {state['tests']}" in context
+
+
+def test_run_cancellable_honours_the_enclosing_scope_while_queued(monkeypatch):
+    pool = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    pool.submit(release.wait, 5)  # Occupy the only worker
+    monkeypatch.setattr(agent, "stage_pool", pool)
+
+    ran = threading.Event()
+    run_cancelled = threading.Event()
+    threading.Timer(0.1, run_cancelled.set).start()
+
+    started = time.monotonic()
+    try:
+        with cancel_scope(run_cancelled), pytest.raises(LLMCallCancelled):
+            agent.run_cancellable(ran.set, threading.Event())
+        assert time.monotonic() - started < 1
+    finally:
+        release.set()
+        pool.shutdown(wait=True)
+
+    assert not ran.is_set()
@@ -0,0 +1,85 @@
+import pytest
+
+import artifacts
+from artifacts import ArtifactStore
+from tools import read_artifact as read_artifact_module
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(tmp_path / "artifacts")
+
+
+def test_identical_content_is_stored_once(store, tmp_path):
+    first = store.put_files({"a.py": "x = 1\n", "b.py": "x = 1\n"})
+    second = store.put_files({"b.py": "x = 1\n", "a.py": "x = 1\n"})
+
+    assert first == second
+    blobs = [p for p in (tmp_path / "artifacts" / "objects").rglob("*") if p.is_file()]
+    assert len(blobs) == 2  # one shared file blob plus the manifest
+
+
+def test_manifest_round_trip(store):
+    ref = store.put_files({"app.py": "print('hi')\n", "pkg/util.py": "def f():\n    pass\n"})
+
+    assert sorted(store.manifest(ref)) == ["app.py", "pkg/util.py"]
+    assert store.read_file(ref, "pkg/util.py") == "def f():\n    pass\n"
+    assert store.read_files(ref, ["app.py", "missing.py"]) == {"app.py": "print('hi')\n"}
+
+
+def test_summarize_diffs_against_base(store):
+    base = store.put_files({"keep.py": "a\n", "edit.py": "old\n", "gone.py": "bye\n"})
+    ref = store.put_files({"keep.py": "a\n", "edit.py": "new\n", "added.py": "hello"})
+
+    summary = store.summarize(ref, base)
+
+    assert summary["files"]["added.py"] == {"digest": store.manifest(ref)["added.py"], "bytes": 5, "lines": 1}
+    assert summary["base_artifact"] == base
+    diff = summary["diff"]
+    assert "-old\n+new\n" in diff
+    assert "+++ b/added.py" in diff and "--- a/gone.py" in diff
+    assert "keep.py" not in diff
+
+
+def test_summarize_truncates_long_diffs(store):
+    base = store.put_files({"big.py": ""})
+    ref = store.put_files({"big.py": "line\n" * 5000})
+
+    diff = store.summarize(ref, base)["diff"]
+
+    assert len(diff) < artifacts.MAX_DIFF_CHARS + 200
+    assert diff.endswith("(diff truncated; use read_artifact for full files)\n")
+
+
+def test_missing_refs(store):
+    ref = store.put_files({"a.py": "x\n"})
+    missing = "artifact:" + "0" * 64
+
+    with pytest.raises(FileNotFoundError):
+        store.manifest(missing)
+    with pytest.raises(FileNotFoundError):
+        store.read_file(ref, "b.py")
+    # An unknown base just means no diff
+    assert store.summarize(ref, missing)["diff"] == ""
+
+
+@pytest.mark.parametrize("ref", [
+    "artifact:../../../../etc/passwd",
+    "artifact:" + "A" * 64,
+    "artifact:" + "0" * 63,
+    "not-an-artifact",
+])
+def test_refs_that_are_not_digests_are_rejected(store, ref):
+    with pytest.raises(ValueError):
+        store.manifest(ref)
+
+
+def test_read_artifact_cannot_escape_the_store(store, tmp_path, monkeypatch):
+    secret = tmp_path / "secret" / "m.json"
+    secret.parent.mkdir()
+    secret.write_text('{"x.py": "../../secret/m.json"}')
+    monkeypatch.setattr(read_artifact_module, "artifact_store", store)
+    traversal = "artifact:" + "../" * 32 + str(secret).lstrip("/")
+
+    with pytest.raises(ValueError):
+        read_artifact_module.read_artifact.invoke({"artifact": traversal, "file_path": "x.py"})
@@ -0,0 +1,158 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from llm_client import AdaptiveConcurrency, LLMCallCancelled, RateLimitedLLM, cancel_scope
+
+
+class MockLLMServer:
+    """Local stand-in for the provider: optional 429s with Retry-After, then echo replies."""
+
+    def __init__(self, *, rate_limited: int = 0, retry_after: str = "0.2", delay: float = 0.0, status: int = 200):
+        self.rate_limited = rate_limited
+        self.retry_after = retry_after
+        self.delay = delay
+        self.status = status
+        self.requests = []
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with server._lock:
+                    server.requests.append(body)
+                    throttled = len(server.requests) <= server.rate_limited
+
+                if throttled:
+                    self.send_response(429)
+                    self.send_header("Retry-After", server.retry_after)
+                    self.end_headers()
+                    return
+
+                time.sleep(server.delay)
+                payload = json.dumps({"text": f"echo: {body['prompt']}", "total_tokens": 7}).encode()
+                self.send_response(server.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/generate"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class MockChatClient:
+    """Minimal runnable that talks to MockLLMServer over HTTP."""
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+
+    def invoke(self, messages, **kwargs):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({"prompt": messages}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            data = json.loads(response.read())
+        return SimpleNamespace(content=data["text"], usage_metadata={"total_tokens": data["total_tokens"]})
+
+
+def test_retries_429_after_retry_after_delay():
+    with MockLLMServer(rate_limited=1, retry_after="0.3") as server:
+        client = RateLimitedLLM(MockChatClient(server.url), base_delay=0.01, max_concurrency=4)
+
+        started = time.monotonic()
+        result = client.invoke("hello")
+        elapsed = time.monotonic() - started
+
+    assert result.content == "echo: hello"
+    assert len(server.requests) == 2
+    assert elapsed >= 0.3
+    # The 429 halved the adaptive concurrency limit
+    assert client.concurrency.limit < 4
+
+
+def test_gives_up_after_max_retries():
+    with MockLLMServer(rate_limited=10, retry_after="0") as server:
+        client = RateLimitedLLM(MockChatClient(server.url), base_delay=0.01, max_retries=2)
+
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            client.invoke("hello")
+
+    assert excinfo.value.code == 429
+    assert len(server.requests) == 3
+
+
+def test_non_retryable_errors_are_raised_immediately():
+    with MockLLMServer(status=400) as server:
+        client = RateLimitedLLM(MockChatClient(server.url), base_delay=0.01)
+
+        with pytest.raises(urllib.error.HTTPError):
+            client.invoke("bad request")
+
+    assert len(server.requests) == 1
+
+
+def test_identical_concurrent_prompts_are_single_flighted():
+    with MockLLMServer(delay=0.3) as server:
+        client = RateLimitedLLM(MockChatClient(server.url))
+        results = []
+
+        def call(prompt):
+            results.append(client.invoke(prompt).content)
+
+        threads = [threading.Thread(target=call, args=("same",)) for _ in range(5)]
+        threads.append(threading.Thread(target=call, args=("different",)))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    assert sorted(results) == ["echo: different"] + ["echo: same"] * 5
+    assert sorted(r["prompt"] for r in server.requests) == ["different", "same"]
+
+
+def test_latency_baselines_are_per_scope():
+    limiter = AdaptiveConcurrency(4, initial_limit=2)
+
+    for _ in range(5):
+        limiter.on_success(0.1, scope="supervisor")
+    limit = limiter.limit
+    # A first long generation sets its own baseline instead of looking "slow"
+    limiter.on_success(30.0, scope="write_code")
+
+    assert limiter.limit > limit
+
+
+def test_cancel_scope_stops_retrying():
+    with MockLLMServer(rate_limited=10, retry_after="5") as server:
+        client = RateLimitedLLM(MockChatClient(server.url), base_delay=0.01)
+        cancel = threading.Event()
+        threading.Timer(0.2, cancel.set).start()
+
+        started = time.monotonic()
+        with cancel_scope(cancel), pytest.raises(LLMCallCancelled):
+            client.invoke("hello")
+
+    assert time.monotonic() - started < 2
+    assert len(server.requests) == 1
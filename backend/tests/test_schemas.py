@@ -0,0 +1,45 @@
+import json
+
+from schemas import CodeOutput, ReviewOutput, parse_output, repair_json
+
+
+def test_repair_keeps_inner_fences_in_fenced_reply():
+    payload = {
+        "thoughts": "t",
+        "code": {
+            "README.md": "# App\n\n```bash\npip install flask\n```\n",
+            "app.py": "from flask import Flask\napp = Flask(__name__)\n",
+        },
+        "mentoring": "Run it with:\n```\nflask run\n```",
+    }
+    reply = "```json\n" + json.dumps(payload, indent=2) + "\n```"
+
+    parsed = parse_output(reply, CodeOutput)
+
+    assert parsed is not None
+    assert parsed.code == payload["code"]
+    assert parsed.mentoring == payload["mentoring"]
+
+
+def test_repair_keeps_inner_fences_when_reply_has_prose():
+    payload = {"code": {"README.md": "```bash\nmake\n```", "main.py": "print(1)\n"}}
+    reply = "Here is the code:\n```json\n" + json.dumps(payload) + "\n```\nEnjoy!"
+
+    assert json.loads(repair_json(reply)) == payload
+
+
+def test_repair_fixes_comments_trailing_commas_and_truncation():
+    reply = '{"thoughts": "x", // why\n "code": {"a.py": "import os\nprint(1)",}, "mentoring": "trunc'
+
+    assert json.loads(repair_json(reply)) == {
+        "thoughts": "x",
+        "code": {"a.py": "import os\nprint(1)"},
+        "mentoring": "trunc",
+    }
+
+
+def test_review_score_is_clamped_instead_of_rejected():
+    parsed = parse_output('{"review": "solid", "score": 85}', ReviewOutput)
+
+    assert parsed is not None
+    assert parsed.score == 10.0
@@ -0,0 +1,118 @@
+import time
+
+import pytest
+
+from tools import fetch_url_content as fetch_module
+from tools import search_web as search_module
+from tools.fetch_url_content import fetch_url_content, set_page_fetcher
+from tools.search_web import PREFETCH_TOP_N, search_web, set_search_backend
+from web_cache import PersistentCache
+
+
+class StubBackend:
+    def __init__(self, *pages):
+        self.pages = list(pages)
+        self.queries = []
+
+    def __call__(self, query, timeout):
+        self.queries.append(query)
+        return self.pages.pop(0) if len(self.pages) > 1 else self.pages[0]
+
+
+class StubFetcher:
+    def __init__(self):
+        self.urls = []
+
+    def __call__(self, url, timeout):
+        self.urls.append(url)
+        return f"text of {url}"
+
+
+def results(*urls):
+    return [{"title": url, "url": url, "snippet": ""} for url in urls]
+
+
+@pytest.fixture
+def fetcher(tmp_path, monkeypatch):
+    monkeypatch.setattr(search_module, "search_cache", PersistentCache(tmp_path / "search.sqlite3", ttl=60, max_entries=100))
+    monkeypatch.setattr(fetch_module, "fetch_cache", PersistentCache(tmp_path / "fetch.sqlite3", ttl=60, max_entries=100))
+    fetcher = StubFetcher()
+    previous = set_page_fetcher(fetcher)
+    yield fetcher
+    set_page_fetcher(previous)
+
+
+@pytest.fixture
+def use_backend(fetcher):
+    previous = []
+
+    def install(backend):
+        previous.append(set_search_backend(backend))
+        return backend
+
+    yield install
+    set_search_backend(previous[0])
+
+
+def test_query_variants_share_a_cache_entry(use_backend):
+    backend = use_backend(StubBackend(results("https://a.dev")))
+
+    first = search_web.invoke({"query": "Python  AsyncIO"})
+    second = search_web.invoke({"query": " python asyncio "})
+
+    assert first == second == results("https://a.dev")
+    assert backend.queries == ["Python  AsyncIO"]
+
+
+def test_results_pointing_at_the_same_page_are_deduped(use_backend):
+    use_backend(StubBackend(results(
+        "https://www.a.dev/docs/?utm_source=x",
+        "https://a.dev/docs",
+        "https://b.dev/",
+    )))
+
+    urls = [r["url"] for r in search_web.invoke({"query": "docs"})]
+
+    assert urls == ["https://www.a.dev/docs/?utm_source=x", "https://b.dev/"]
+
+
+def test_max_results_slices_cached_results(use_backend):
+    backend = use_backend(StubBackend(results(*(f"https://{n}.dev" for n in range(8)))))
+
+    assert len(search_web.invoke({"query": "many", "max_results": 2})) == 2
+    assert len(search_web.invoke({"query": "many", "max_results": 6})) == 6
+    assert len(backend.queries) == 1
+
+
+def test_empty_results_are_not_cached(use_backend):
+    backend = use_backend(StubBackend([], results("https://a.dev")))
+
+    assert search_web.invoke({"query": "throttled"}) == []
+    assert search_web.invoke({"query": "throttled"}) == results("https://a.dev")
+    assert len(backend.queries) == 2
+
+
+def test_backends_do_not_share_cache_entries(use_backend):
+    use_backend(StubBackend(results("https://first.dev")))
+    search_web.invoke({"query": "same"})
+
+    set_search_backend(lambda query, timeout: results("https://second.dev"))
+
+    assert search_web.invoke({"query": "same"}) == results("https://second.dev")
+
+
+def test_prefetch_goes_through_the_page_fetcher(use_backend, fetcher):
+    urls = [f"https://{n}.dev" for n in range(PREFETCH_TOP_N + 2)]
+    use_backend(StubBackend(results(*urls)))
+
+    search_web.invoke({"query": "prefetch", "max_results": len(urls)})
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline and not all(
+        fetch_module._cache_key(url) in fetch_module.fetch_cache for url in urls[:PREFETCH_TOP_N]
+    ):
+        time.sleep(0.01)
+
+    assert sorted(fetcher.urls) == sorted(urls[:PREFETCH_TOP_N])
+    # Served from the cache the prefetch filled
+    assert fetch_url_content.invoke({"url": urls[0]}) == f"text of {urls[0]}"
+    assert len(fetcher.urls) == PREFETCH_TOP_N
@@ -0,0 +1,110 @@
+import os
+
+import numpy as np
+import pytest
+
+from tools import semantic_search as ss
+from tools.read_code import read_code
+
+
+class CountingEmbedder(ss.HashingEmbedder):
+    """Hashing embedder that records which texts it was asked to embed."""
+
+    def __init__(self, dim: int = 256) -> None:
+        super().__init__(dim)
+        self.embedded = []
+
+    def embed(self, texts):
+        self.embedded.extend(texts)
+        return super().embed(texts)
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    monkeypatch.setattr(ss, "INDEX_DIR", tmp_path / "index")
+    monkeypatch.setattr(ss, "_embedder", ss.HashingEmbedder())
+    root = tmp_path / "src"
+    root.mkdir()
+    (root / "parser.py").write_text("def parse_tokens(source):\n    return source.split()\n")
+    (root / "server.js").write_text("function startServer(port) {\n  listen(port);\n}\n")
+    (root / "notes.md").write_text("Release checklist for version two\n")
+    return root
+
+
+def test_chunks_are_read_code_ranges(tmp_path):
+    path = tmp_path / "long.py"
+    lines = [f"line_{n} = {n}\n" for n in range(1, 96)]
+    path.write_text("".join(lines))
+
+    chunks, _ = ss.SemanticIndex._chunk("long.py", path.read_text())
+
+    assert chunks[0][1] == 1 and chunks[-1][2] == len(lines)
+    for (_, start, end), (_, next_start, _) in zip(chunks, chunks[1:]):
+        assert end - next_start + 1 == ss.CHUNK_OVERLAP
+    for _, start, end in chunks:
+        text = read_code.invoke({"file_path": str(path), "start_line": start, "end_line": end})
+        assert text == "".join(lines[start - 1:end])
+
+
+def test_refresh_reembeds_only_changed_files(tree):
+    embedder = CountingEmbedder()
+    index = ss.SemanticIndex(tree, embedder)
+    index.refresh()
+    unchanged = np.array(index.vectors[[i for i, c in enumerate(index.chunks) if c[0] == "server.js"]])
+
+    embedder.embedded.clear()
+    os.utime(tree / "server.js")  # Touched but identical
+    (tree / "parser.py").write_text("def parse_lines(source):\n    return source.splitlines()\n")
+    (tree / "notes.md").unlink()
+    index.refresh()
+
+    assert [text.split("\n")[0] for text in embedder.embedded] == ["parser.py"]
+    assert sorted(c[0] for c in index.chunks) == ["parser.py", "server.js"]
+    assert np.array_equal(index.vectors[[i for i, c in enumerate(index.chunks) if c[0] == "server.js"]], unchanged)
+
+    # The saved index reloads as-is without re-embedding
+    reloaded = ss.SemanticIndex(tree, embedder)
+    assert reloaded.chunks == index.chunks
+    assert reloaded.vectors.shape == index.vectors.shape
+
+
+def test_embedder_change_forces_rebuild(tree):
+    ss.SemanticIndex(tree, ss.HashingEmbedder(dim=128)).refresh()
+
+    embedder = CountingEmbedder(dim=64)
+    index = ss.SemanticIndex(tree, embedder)
+    assert index.chunks == []
+
+    index.refresh()
+    assert len(embedder.embedded) == 3
+    assert index.vectors.shape == (3, 64)
+
+
+def test_file_extensions_filter(tree):
+    results = ss.semantic_search.invoke({
+        "query": "start server parse tokens",
+        "root_path": str(tree),
+        "file_extensions": [".py"],
+    })
+
+    assert results
+    assert {os.path.basename(r["file"]) for r in results} == {"parser.py"}
+
+
+def test_batched_queries(tree):
+    results = ss.semantic_search.invoke({
+        "query": ["parse tokens", "start server port"],
+        "root_path": str(tree),
+        "top_k": 1,
+    })
+
+    assert [(r["query"], os.path.basename(r["file"])) for r in results] == [
+        ("parse tokens", "parser.py"),
+        ("start server port", "server.js"),
+    ]
+
+
+def test_unrelated_chunks_are_not_returned(tree):
+    results = ss.semantic_search.invoke({"query": "zebra quokka", "root_path": str(tree)})
+
+    assert results == []
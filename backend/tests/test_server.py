@@ -0,0 +1,246 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient # type: ignore
+from langchain_core.messages import AIMessage, ToolMessage
+
+import agent
+import server
+from llm_client import check_cancelled
+from server import QueueFullError, RunCancelledError, RunScheduler
+
+
+class FakeGraph:
+    """
+    Stands in for the compiled graph and its checkpointer: each run streams
+    a few steps, and the fake records how runs overlapped and which
+    checkpoint threads were deleted.
+    """
+
+    def __init__(self, steps: int = 3, delay: float = 0.02) -> None:
+        self.steps = steps
+        self.delay = delay
+        self.active = {}
+        self.max_active = 0
+        self.overlapped = False
+        self.deleted = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self._lock = threading.Lock()
+
+    def stream(self, input, config, stream_mode):
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            self.overlapped |= bool(self.active.get(thread_id))
+            self.active[thread_id] = self.active.get(thread_id, 0) + 1
+            self.max_active = max(self.max_active, sum(self.active.values()))
+        try:
+            self.gate.wait(5)
+            for step in range(self.steps):
+                time.sleep(self.delay)
+                yield {"node": {"messages": [AIMessage(content=f"{input['messages'][0].content}:{step}")]}}
+        finally:
+            with self._lock:
+                self.active[thread_id] -= 1
+
+    def get_state(self, config):
+        return SimpleNamespace(values={}, next=())
+
+    def update_state(self, *args, **kwargs):
+        pass
+
+    def delete_thread(self, thread_id):
+        self.deleted.append(thread_id)
+
+
+@pytest.fixture
+def fake_graph(monkeypatch):
+    graph = FakeGraph()
+    monkeypatch.setattr(server, "graph_app", graph)
+    monkeypatch.setattr(server, "checkpointer", graph)
+    return graph
+
+
+def run_with_scheduler(scenario, **kwargs):
+    async def main():
+        scheduler = RunScheduler(**kwargs)
+        await scheduler.start()
+        try:
+            return await scenario(scheduler)
+        finally:
+            await scheduler.stop()
+
+    return asyncio.run(main())
+
+
+async def settle(*runs):
+    return await asyncio.gather(*(run.future for run in runs), return_exceptions=True)
+
+
+def test_admission_is_bounded_globally_and_per_session(fake_graph):
+    fake_graph.gate.clear()
+
+    async def scenario(scheduler):
+        a, b = scheduler.create_session(), scheduler.create_session()
+        runs = [scheduler.submit(a.session_id, "a1"), scheduler.submit(a.session_id, "a2")]
+        with pytest.raises(QueueFullError, match="this session"):
+            scheduler.submit(a.session_id, "a3")
+
+        runs.append(scheduler.submit(b.session_id, "b1"))
+        with pytest.raises(QueueFullError, match="capacity"):
+            scheduler.submit(b.session_id, "b2")
+
+        fake_graph.gate.set()
+        return await settle(*runs)
+
+    results = run_with_scheduler(scenario, max_workers=2, max_queued=3, max_per_session=2)
+    assert results == ["a1:2", "a2:2", "b1:2"]
+
+
+def test_runs_of_a_session_are_serialized_and_sessions_run_in_parallel(fake_graph):
+    async def scenario(scheduler):
+        a, b = scheduler.create_session(), scheduler.create_session()
+        runs = [scheduler.submit(s.session_id, f"{s.session_id}-{i}") for i in range(3) for s in (a, b)]
+        return await settle(*runs)
+
+    results = run_with_scheduler(scenario, max_workers=4)
+    assert all(isinstance(r, str) for r in results)
+    assert not fake_graph.overlapped
+    assert fake_graph.max_active == 2
+
+
+def test_cancel_stops_running_and_queued_runs(fake_graph):
+    fake_graph.steps, fake_graph.delay = 100, 0.02
+
+    async def scenario(scheduler):
+        session = scheduler.create_session()
+        running = scheduler.submit(session.session_id, "first")
+        queued = scheduler.submit(session.session_id, "second")
+        await asyncio.sleep(0.1)
+
+        assert scheduler.cancel(session.session_id) == 2
+        results = await settle(running, queued)
+
+        # The session stays usable after a cancel
+        fake_graph.steps = 1
+        return results, await scheduler.submit(session.session_id, "third").future
+
+    started = time.monotonic()
+    (running, queued), third = run_with_scheduler(scenario, max_workers=2)
+    assert isinstance(running, RunCancelledError) and isinstance(queued, RunCancelledError)
+    assert third == "third:0"
+    assert time.monotonic() - started < 1
+
+
+def test_session_cap_reaps_idle_sessions(fake_graph):
+    async def scenario(scheduler):
+        idle = scheduler.create_session()
+        await asyncio.sleep(0.3)
+        busy = scheduler.create_session()
+        fake_graph.gate.clear()
+        run = scheduler.submit(busy.session_id, "work")
+
+        # idle is past the TTL and reaped to make room; busy has a run and is kept
+        scheduler.create_session()
+        with pytest.raises(QueueFullError, match="sessions"):
+            scheduler.create_session()
+
+        fake_graph.gate.set()
+        await run.future
+        return idle
+
+    idle = run_with_scheduler(scenario, max_sessions=2, session_idle_ttl=0.2)
+    assert fake_graph.deleted == [idle.thread_id]
+
+
+def test_closing_a_session_mid_run_defers_checkpoint_deletion(fake_graph):
+    fake_graph.steps, fake_graph.delay = 5, 0.05
+
+    async def scenario(scheduler):
+        session = scheduler.create_session()
+        run = scheduler.submit(session.session_id, "work")
+        await asyncio.sleep(0.1)
+
+        scheduler.close_session(session.session_id)
+        deleted_on_close = list(fake_graph.deleted)
+        await settle(run)
+        return session, deleted_on_close
+
+    session, deleted_on_close = run_with_scheduler(scenario)
+    assert deleted_on_close == []
+    assert fake_graph.deleted == [session.thread_id]
+
+
+def test_http_api_runs_through_the_app_lifespan(fake_graph):
+    with TestClient(server.server) as client:
+        session_id = client.post("/sessions").json()["session_id"]
+        response = client.post(f"/sessions/{session_id}/runs", json={"message": "hello"})
+        missing = client.post("/sessions/nope/runs", json={"message": "hello"})
+
+    assert response.json()["output"] == "hello:2"
+    assert missing.status_code == 404
+
+
+class StubSupervisor:
+    """Asks for write_code once, then finishes; records each history it is sent."""
+
+    def __init__(self) -> None:
+        self.histories = []
+
+    def invoke(self, messages, **kwargs):
+        self.histories.append(list(messages))
+        if len(self.histories) == 1:
+            return AIMessage(content="", tool_calls=[{"name": "write_code", "args": {"spec": "app"}, "id": "call-1"}])
+        return AIMessage(content="done")
+
+
+class BlockingLLM:
+    """Never answers; stops at the same checkpoint RateLimitedLLM does."""
+
+    def __init__(self) -> None:
+        self.entered = threading.Event()
+
+    def invoke(self, messages, **kwargs):
+        self.entered.set()
+        while True:
+            check_cancelled()
+            time.sleep(0.01)
+
+
+def test_cancelled_run_leaves_no_dangling_tool_calls(monkeypatch):
+    supervisor = StubSupervisor()
+    writer = BlockingLLM()
+    monkeypatch.setattr(agent, "llm_with_tools", supervisor)
+    monkeypatch.setitem(agent.structured_llms, agent.CodeOutput, writer)
+
+    async def scenario():
+        scheduler = RunScheduler(max_workers=1)
+        await scheduler.start()
+        try:
+            session = scheduler.create_session()
+            run = scheduler.submit(session.session_id, "build an app")
+            await asyncio.get_running_loop().run_in_executor(None, writer.entered.wait, 5)
+            scheduler.cancel(session.session_id)
+            with pytest.raises(RunCancelledError):
+                await run.future
+
+            config = {"configurable": {"thread_id": session.thread_id}}
+            state = server.graph_app.get_state(config)
+            assert state.next == ()
+
+            rerun = scheduler.submit(session.session_id, "try again")
+            assert await rerun.future == "done"
+        finally:
+            await scheduler.stop()
+
+    asyncio.run(scenario())
+
+    history = supervisor.histories[-1]
+    calls = [call["id"] for m in history if isinstance(m, AIMessage) for call in m.tool_calls]
+    answered = [m for m in history if isinstance(m, ToolMessage)]
+    assert calls == ["call-1"]
+    assert [m.tool_call_id for m in answered] == ["call-1"]
+    assert answered[0].content.startswith("Cancelled")
@@ -0,0 +1,44 @@
+from web_cache import PersistentCache, fetch_key, normalize_url
+
+
+def test_normalize_url_drops_tracking_noise():
+    assert normalize_url("https://www.Example.com/docs/?utm_source=x&b=2&a=1#intro") == (
+        "https://example.com/docs?a=1&b=2"
+    )
+
+
+def test_ref_parameters_select_distinct_pages():
+    main = "https://api.github.com/repos/o/r/contents/x.py?ref=main"
+    dev = "https://api.github.com/repos/o/r/contents/x.py?ref=dev"
+
+    assert normalize_url(main) != normalize_url(dev)
+    assert fetch_key(main) != fetch_key(dev)
+
+
+def test_fetch_key_only_drops_the_fragment():
+    assert fetch_key(" https://example.com/a/?utm_source=x#top ") == "https://example.com/a/?utm_source=x"
+
+
+def test_cache_touches_disk_only_on_first_use(tmp_path):
+    cache = PersistentCache(tmp_path / "cache" / "search.sqlite3", ttl=60, max_entries=10)
+    assert not (tmp_path / "cache").exists()
+
+    cache.set("q", [{"url": "https://example.com"}])
+
+    assert cache.get("q") == [{"url": "https://example.com"}]
+    cache.clear()
+    assert cache.get("q") is None
+
+
+def test_cache_expires_and_evicts_least_recently_used(tmp_path):
+    cache = PersistentCache(tmp_path / "c.sqlite3", ttl=60, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    cache.ttl = 0
+    assert cache.get("a") is None
@@ -1,21 +1,21 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable
 import requests  # type: ignore
 from bs4 import BeautifulSoup  # type: ignore
 from langchain_core.tools import tool # type: ignore
 
+from web_cache import fetch_cache, fetch_key, source_id # type: ignore
 
-@tool
-def fetch_url_content(url: str, *, timeout: int = 15) -> str:
-    """
-    Fetch and extract the full readable text content from a URL.
+# Background pool for pre-fetching search results; in-flight fetches are shared
+_prefetch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="codeartisan-prefetch")
+_in_flight: Dict[str, Future] = {}
+_in_flight_lock = threading.Lock()
 
-    Args:
-        url (str): Web page URL
-        timeout (int): Request timeout in seconds
+PageFetcher = Callable[[str, int], str]
 
-    Returns:
-        str: Cleaned textual content of the page
-    """
 
+def _download_text(url: str, timeout: int) -> str:
     headers = {
         "User-Agent": (
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -54,4 +54,89 @@ def fetch_url_content(url: str, *, timeout: int = 15) -> str:
     lines = [line.strip() for line in text.splitlines()]
     lines = [line for line in lines if line]
 
-    return "\n".join(lines)
\ No newline at end of file
+    return "\n".join(lines)
+
+
+_fetcher: PageFetcher = _download_text
+
+
+def set_page_fetcher(fetcher: PageFetcher) -> PageFetcher:
+    """
+    Swap the page fetcher (e.g. for a local stub in tests).
+
+    A fetcher takes (url, timeout) and returns the page's readable text.
+    Fetched pages are cached per fetcher, and prefetches after a search go
+    through it too. Returns the previous fetcher so it can be restored.
+    """
+    global _fetcher
+    previous, _fetcher = _fetcher, fetcher
+    return previous
+
+
+def _cache_key(url: str) -> str:
+    return f"{source_id(_fetcher)}:{fetch_key(url)}"
+
+
+def _fetch_and_cache(url: str, timeout: int) -> str:
+    key = _cache_key(url)
+    text = _fetcher(url, timeout)
+    fetch_cache.set(key, text)
+    return text
+
+
+def fetch_page(url: str, timeout: int = 15) -> str:
+    """Return page text from the fetch cache, an in-flight prefetch, or the network."""
+    key = _cache_key(url)
+
+    cached = fetch_cache.get(key)
+    if cached is not None:
+        return cached
+
+    with _in_flight_lock:
+        pending = _in_flight.get(key)
+    if pending is not None:
+        try:
+            return pending.result(timeout=timeout)
+        except Exception:
+            pass  # Prefetch failed or is too slow; fetch ourselves
+
+    return _fetch_and_cache(url, timeout)
+
+
+def prefetch(urls: Iterable[str], timeout: int = 15) -> None:
+    """Warm the fetch cache for urls in the background."""
+    for url in urls:
+        key = _cache_key(url)
+        if key in fetch_cache:
+            continue
+        with _in_flight_lock:
+            if key in _in_flight:
+                continue
+            future = _prefetch_pool.submit(_fetch_and_cache, url, timeout)
+            _in_flight[key] = future
+        future.add_done_callback(lambda _, key=key: _forget(key))
+
+
+def _forget(key: str) -> None:
+    with _in_flight_lock:
+        _in_flight.pop(key, None)
+
+
+@tool
+def fetch_url_content(url: str, *, timeout: int = 15) -> str:
+    """
+    Fetch and extract the full readable text content from a URL.
+
+    Pages are served from a local cache for 24 hours by default
+    (CODEARTISAN_FETCH_CACHE_TTL), and search_web prefetches its top
+    results into it, so the text may be up to a day old.
+
+    Args:
+        url (str): Web page URL
+        timeout (int): Request timeout in seconds
+
+    Returns:
+        str: Cleaned textual content of the page
+    """
+
+    return fetch_page(url, timeout)
@@ -0,0 +1,43 @@
+from typing import Dict, List, Union
+from langchain_core.tools import tool # type: ignore
+
+from artifacts import artifact_store # type: ignore
+
+@tool
+def read_artifact(
+    artifact: str,
+    file_path: str | None = None,
+    *,
+    start_line: int = 1,
+    end_line: int | None = None,
+) -> Union[str, List[Dict[str, Union[str, int]]]]:
+    """
+    Read generated code from the artifact store on demand.
+
+    Args:
+        artifact (str): Artifact reference (e.g. "artifact:3fa4...")
+        file_path (str | None): File inside the artifact; omit to list its files
+        start_line (int): Starting line number (1-based)
+        end_line (int | None): Ending line number (1-based, inclusive); omit for end of file
+
+    Returns:
+        str | list[dict]: File content for the line range, or the artifact's file listing
+    """
+
+    if file_path is None:
+        summary = artifact_store.summarize(artifact)
+        return [
+            {"file": path, "lines": info["lines"], "bytes": info["bytes"]}
+            for path, info in summary["files"].items()
+        ]
+
+    if start_line < 1:
+        raise ValueError("Line numbers must be >= 1")
+
+    lines = artifact_store.read_file(artifact, file_path).splitlines(keepends=True)
+    end_index = len(lines) if end_line is None else min(end_line, len(lines))
+
+    if start_line > end_index:
+        return ""
+
+    return "".join(lines[start_line - 1:end_index])
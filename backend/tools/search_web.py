@@ -1,27 +1,21 @@
+import os
 import requests  # type: ignore
 from bs4 import BeautifulSoup  # type: ignore
-from typing import List, Dict
+from typing import Callable, List, Dict
 from urllib.parse import unquote
 from langchain_core.tools import tool # type: ignore
 
-@tool
-def search_web(
-    query: str,
-    *,
-    max_results: int = 5,
-    timeout: int = 10,
-) -> List[Dict[str, str]]:
-    """
-    Perform a free web search using DuckDuckGo (no API required).
+from tools.fetch_url_content import prefetch # type: ignore
+from web_cache import normalize_query, normalize_url, search_cache, source_id # type: ignore
 
-    Args:
-        query (str): Search query
-        max_results (int): Max number of results to return
-        timeout (int): Request timeout in seconds
+# Number of top result pages warmed into the fetch cache after each search
+PREFETCH_TOP_N = int(os.getenv("CODEARTISAN_PREFETCH_TOP_N", "3"))
 
-    Returns:
-        List[dict]: Search results with title, url, and snippet
-    """
+SearchBackend = Callable[[str, int], List[Dict[str, str]]]
+
+
+def duckduckgo_search(query: str, timeout: int) -> List[Dict[str, str]]:
+    """Scrape every result from DuckDuckGo's HTML endpoint."""
 
     url = "https://duckduckgo.com/html/"
     params = {
@@ -45,9 +39,6 @@ def search_web(
     results: List[Dict[str, str]] = []
 
     for result in soup.select("div.result"):
-        if len(results) >= max_results:
-            break
-
         link = result.select_one("a.result__a")
         snippet = result.select_one("a.result__snippet, div.result__snippet")
 
@@ -58,7 +49,7 @@ def search_web(
 
         # DuckDuckGo wraps URLs like /l/?uddg=ENCODED_URL
         if "uddg=" in href:
-            href = unquote(href.split("uddg=")[-1])
+            href = unquote(href.split("uddg=")[-1].split("&")[0])
 
         results.append({
             "title": link.get_text(strip=True),
@@ -66,4 +57,74 @@ def search_web(
             "snippet": snippet.get_text(strip=True) if snippet else ""
         })
 
-    return results
\ No newline at end of file
+    return results
+
+
+_backend: SearchBackend = duckduckgo_search
+
+
+def set_search_backend(backend: SearchBackend) -> SearchBackend:
+    """
+    Swap the search backend (e.g. for a local stub in tests).
+
+    A backend takes (query, timeout) and returns result dicts with title,
+    url and snippet. Cached results are keyed by backend, so a stub never
+    sees results cached from another backend. Result pages are prefetched
+    through tools.fetch_url_content, whose fetcher is swapped separately
+    with set_page_fetcher. Returns the previous backend so it can be
+    restored.
+    """
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
+
+
+def dedupe_results(results: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Drop results that point at the same page once tracking noise is removed."""
+    seen = set()
+    unique: List[Dict[str, str]] = []
+    for result in results:
+        key = normalize_url(result["url"])
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(result)
+    return unique
+
+
+@tool
+def search_web(
+    query: str,
+    *,
+    max_results: int = 5,
+    timeout: int = 10,
+) -> List[Dict[str, str]]:
+    """
+    Perform a free web search using DuckDuckGo (no API required).
+
+    Results are cached per normalized query and the top pages are fetched
+    in the background, so follow-up fetch_url_content calls are instant.
+
+    Args:
+        query (str): Search query
+        max_results (int): Max number of results to return
+        timeout (int): Request timeout in seconds
+
+    Returns:
+        List[dict]: Search results with title, url, and snippet
+    """
+
+    key = f"{source_id(_backend)}:{normalize_query(query)}"
+
+    results = search_cache.get(key)
+    if results is None:
+        results = dedupe_results(_backend(query, timeout))
+        # Empty pages usually mean we were throttled; don't pin that for a whole TTL
+        if results:
+            search_cache.set(key, results)
+
+    results = results[:max_results]
+
+    prefetch(r["url"] for r in results[:PREFETCH_TOP_N] if r["url"].startswith("http"))
+
+    return results
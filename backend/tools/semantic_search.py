@@ -0,0 +1,362 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+import numpy as np  # type: ignore
+from langchain_core.tools import tool # type: ignore
+
+from web_cache import CACHE_DIR # type: ignore
+
+# Indexes live under the cache dir, never inside the (possibly read-only) tree they index
+INDEX_DIR = CACHE_DIR / "semantic_index"
+CHUNK_LINES = 40
+CHUNK_OVERLAP = 10
+HASH_DIM = 1024
+EMBED_BATCH = 256
+
+SOURCE_EXTENSIONS = {
+    ".py", ".js", ".jsx", ".ts", ".tsx", ".java", ".kt", ".go", ".rs", ".rb",
+    ".php", ".c", ".h", ".cc", ".cpp", ".hpp", ".cs", ".swift", ".scala",
+    ".sh", ".sql", ".html", ".css", ".md", ".toml", ".yaml", ".yml", ".json",
+}
+SKIP_DIRS = {".git", ".codeartisan", "node_modules", "__pycache__", ".venv", "venv", "dist", "build"}
+
+TOKEN_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+SUBTOKEN_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+
+class HashingEmbedder:
+    """
+    Dependency-free fallback: signed feature hashing of identifiers and their
+    camelCase/snake_case parts, log-scaled and L2-normalised.
+    """
+
+    def __init__(self, dim: int = HASH_DIM) -> None:
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> List[str]:
+        features = []
+        for token in TOKEN_RE.findall(text):
+            features.append(token.lower())
+            parts = [p.lower() for p in SUBTOKEN_RE.findall(token)]
+            if len(parts) > 1:
+                features.extend(parts)
+        return features
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        rows, cols, signs = [], [], []
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+                rows.append(row)
+                cols.append(h % self.dim)
+                signs.append(1.0 if (h >> 63) else -1.0)
+
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(vectors, (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)), signs)
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        return _normalize(vectors)
+
+
+class FastEmbedEmbedder:
+    """
+    Local CPU-only ONNX model via fastembed, when it is installed and the
+    model is already in the local cache. Never downloads.
+    """
+
+    def __init__(self, model_name: str) -> None:
+        from fastembed import TextEmbedding  # type: ignore
+
+        self._model = TextEmbedding(
+            model_name=model_name,
+            local_files_only=True,
+            providers=["CPUExecutionProvider"],
+        )
+        self.name = f"fastembed-{model_name}"
+        self.dim = int(self.embed(["probe"]).shape[1])
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.asarray(list(self._model.embed(texts)), dtype=np.float32)
+        return _normalize(vectors)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+def _load_embedder():
+    model_name = os.getenv("CODEARTISAN_EMBED_MODEL", "BAAI/bge-small-en-v1.5")
+    try:
+        return FastEmbedEmbedder(model_name)
+    except Exception:
+        # fastembed missing or model not cached locally
+        return HashingEmbedder()
+
+
+class SemanticIndex:
+    """
+    Chunked embedding index for one source tree.
+
+    Vectors live in a float32 .npy file opened memory-mapped; chunk metadata
+    and per-file (mtime, size, sha1) live alongside in chunks.json, which
+    names the vectors file and its row count. `refresh` re-embeds only files
+    whose content hash changed.
+    """
+
+    def __init__(self, root: Path, embedder) -> None:
+        self.root = root
+        self.embedder = embedder
+        self.index_dir = INDEX_DIR / hashlib.sha256(str(root).encode("utf-8")).hexdigest()[:32]
+        self.files: Dict[str, List] = {}
+        self.chunks: List[Tuple[str, int, int]] = []
+        self.vectors = np.zeros((0, embedder.dim), dtype=np.float32)
+        self.vectors_name = ""
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        meta_path = self.index_dir / "chunks.json"
+        if not meta_path.exists():
+            return
+
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        # A different embedder means incompatible vectors; start over
+        if meta.get("embedder") != self.embedder.name:
+            return
+
+        vectors_path = self.index_dir / meta.get("vectors", "")
+        if not meta.get("vectors") or not vectors_path.exists():
+            return
+        vectors = np.load(vectors_path, mmap_mode="r")
+        # Vectors and chunks must come from the same commit; otherwise rebuild
+        if vectors.shape != (meta.get("rows"), self.embedder.dim) or len(meta["chunks"]) != vectors.shape[0]:
+            return
+
+        self.files = meta["files"]
+        self.chunks = [tuple(c) for c in meta["chunks"]]
+        self.vectors = vectors
+        self.vectors_name = meta["vectors"]
+
+    def _save_meta(self) -> None:
+        # chunks.json is the commit point: it names the vectors file it belongs to
+        meta_tmp = self.index_dir / "chunks.tmp.json"
+        meta_tmp.write_text(json.dumps({
+            "embedder": self.embedder.name,
+            "vectors": self.vectors_name,
+            "rows": len(self.chunks),
+            "files": self.files,
+            "chunks": self.chunks,
+        }), encoding="utf-8")
+        os.replace(meta_tmp, self.index_dir / "chunks.json")
+
+    def _save(self) -> None:
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+
+        # Each save writes a new generation of vectors, so a crash before the
+        # metadata is replaced leaves the previous pair intact
+        self.vectors_name = f"vectors-{uuid.uuid4().hex}.npy"
+        vectors_path = self.index_dir / self.vectors_name
+        np.save(vectors_path, np.ascontiguousarray(self.vectors, dtype=np.float32))
+        self._save_meta()
+        self.vectors = np.load(vectors_path, mmap_mode="r")
+
+        # Drop superseded generations, including any left by an interrupted save
+        for path in self.index_dir.glob("vectors-*.npy"):
+            if path.name != self.vectors_name:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def _source_files(self):
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+            for name in filenames:
+                path = Path(dirpath) / name
+                if path.suffix in SOURCE_EXTENSIONS:
+                    yield path
+
+    @staticmethod
+    def _chunk(path: str, text: str) -> Tuple[List[Tuple[str, int, int]], List[str]]:
+        lines = text.splitlines()
+        chunks, texts = [], []
+        step = CHUNK_LINES - CHUNK_OVERLAP
+        for start in range(0, max(len(lines), 1), step):
+            window = lines[start:start + CHUNK_LINES]
+            if not any(line.strip() for line in window):
+                continue
+            chunks.append((path, start + 1, start + len(window)))
+            # Include the path so file names contribute to relevance
+            texts.append(path + "\n" + "\n".join(window))
+            if start + CHUNK_LINES >= len(lines):
+                break
+        return chunks, texts
+
+    def refresh(self) -> None:
+        seen: Dict[str, List] = {}
+        changed: List[str] = []
+
+        for path in self._source_files():
+            rel = path.relative_to(self.root).as_posix()
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+
+            previous = self.files.get(rel)
+            if previous and previous[0] == stat.st_mtime_ns and previous[1] == stat.st_size:
+                seen[rel] = previous
+                continue
+
+            try:
+                digest = hashlib.sha1(path.read_bytes()).hexdigest()
+            except OSError:
+                continue
+            seen[rel] = [stat.st_mtime_ns, stat.st_size, digest]
+            if not previous or previous[2] != digest:
+                changed.append(rel)
+
+        removed = set(self.files) - set(seen)
+        if not changed and not removed:
+            if seen != self.files:
+                self.files = seen  # Only mtimes moved; persist so we skip rehashing next time
+                if self.vectors_name:
+                    self._save_meta()
+                else:
+                    self._save()
+            return
+
+        # Keep rows of untouched files, re-embed the rest
+        stale = removed | set(changed)
+        keep = [i for i, chunk in enumerate(self.chunks) if chunk[0] not in stale]
+        chunks = [self.chunks[i] for i in keep]
+        parts = [np.asarray(self.vectors[keep], dtype=np.float32)] if keep else []
+
+        new_chunks, new_texts = [], []
+        for rel in changed:
+            text = (self.root / rel).read_text(encoding="utf-8", errors="ignore")
+            file_chunks, file_texts = self._chunk(rel, text)
+            new_chunks.extend(file_chunks)
+            new_texts.extend(file_texts)
+
+        for start in range(0, len(new_texts), EMBED_BATCH):
+            parts.append(self.embedder.embed(new_texts[start:start + EMBED_BATCH]))
+
+        self.chunks = chunks + new_chunks
+        self.vectors = np.concatenate(parts) if parts else np.zeros((0, self.embedder.dim), dtype=np.float32)
+        self.files = seen
+        self._save()
+
+    def search(self, queries: List[str], top_k: int, file_extensions: List[str] | None = None) -> List[List[Tuple[int, float]]]:
+        if not self.chunks:
+            return [[] for _ in queries]
+
+        # One matrix product scores every chunk against every query
+        scores = np.asarray(self.vectors @ self.embedder.embed(queries).T)
+
+        if file_extensions:
+            allowed = np.array([Path(c[0]).suffix in file_extensions for c in self.chunks])
+            scores[~allowed] = -np.inf
+
+        k = min(top_k, len(self.chunks))
+        results = []
+        for column in scores.T:
+            top = np.argpartition(-column, k - 1)[:k]
+            top = top[np.argsort(-column[top])]
+            # Unrelated chunks score <= 0; they are not matches, however few hits remain
+            results.append([(int(i), float(column[i])) for i in top if np.isfinite(column[i]) and column[i] > 0])
+        return results
+
+
+_indexes: Dict[str, SemanticIndex] = {}
+_indexes_lock = threading.Lock()
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder():
+    global _embedder
+    # Separate lock: loading the model must not block lookups of built indexes
+    with _embedder_lock:
+        if _embedder is None:
+            _embedder = _load_embedder()
+        return _embedder
+
+
+def get_index(root_path: str) -> SemanticIndex:
+    root = Path(root_path).resolve()
+    with _indexes_lock:
+        index = _indexes.get(str(root))
+    if index is not None:
+        return index
+
+    embedder = get_embedder()
+    with _indexes_lock:
+        index = _indexes.get(str(root))
+        if index is None:
+            index = _indexes[str(root)] = SemanticIndex(root, embedder)
+        return index
+
+
+@tool
+def semantic_search(
+    query: Union[str, List[str]],
+    root_path: str,
+    *,
+    top_k: int = 5,
+    file_extensions: List[str] | None = None,
+    refresh: bool = True,
+) -> List[Dict[str, Union[str, int, float]]]:
+    """
+    Find code by meaning rather than exact text, using a local vector index.
+
+    Args:
+        query (str | list[str]): Natural-language or code query; pass a list to batch queries
+        root_path (str): Root directory of the source tree to search
+        top_k (int): Number of matches to return per query
+        file_extensions (list[str] | None): Limit results to extensions (e.g. ['.py'])
+        refresh (bool): Re-index changed files before searching
+
+    Returns:
+        List[dict]: Matches with query, file, start_line, end_line (usable with read_code) and score
+    """
+
+    root = Path(root_path)
+
+    if not root.exists():
+        raise FileNotFoundError(f"Path not found: {root}")
+
+    if not root.is_dir():
+        raise NotADirectoryError(f"Not a directory: {root}")
+
+    queries = [query] if isinstance(query, str) else list(query)
+    index = get_index(root_path)
+
+    results: List[Dict[str, Union[str, int, float]]] = []
+
+    # Resolve hits while holding the lock; another session's refresh replaces chunks
+    with index.lock:
+        if refresh:
+            index.refresh()
+        matches = index.search(queries, top_k, file_extensions)
+
+        for q, hits in zip(queries, matches):
+            for i, score in hits:
+                rel, start_line, end_line = index.chunks[i]
+                results.append({
+                    "query": q,
+                    "file": str(index.root / rel),
+                    "start_line": start_line,
+                    "end_line": end_line,
+                    "score": round(score, 4),
+                })
+
+    return results
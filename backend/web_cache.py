@@ -0,0 +1,144 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+from urllib.parse import parse_qsl, urldefrag, urlencode, urlsplit, urlunsplit
+
+CACHE_DIR = Path(os.getenv("CODEARTISAN_CACHE_DIR", ".codeartisan/cache"))
+
+# Query parameters that only track the click and never change the page
+TRACKING_PARAMS = {"fbclid", "gclid", "msclkid"}
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form used to dedupe search results that point at the same page."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ))
+    path = parts.path.rstrip("/") or "/"
+
+    return urlunsplit((parts.scheme.lower() or "https", host, path, query, ""))
+
+
+def source_id(source: Callable[..., Any]) -> str:
+    """Stable name for a pluggable backend/fetcher, used to keep their cache entries apart."""
+    name = getattr(source, "__qualname__", None) or type(source).__qualname__
+    return f"{getattr(source, '__module__', '')}.{name}"
+
+
+def fetch_key(url: str) -> str:
+    """
+    Fetch cache key: the URL minus its fragment. Deliberately stricter than
+    normalize_url, since a wrongly shared key would serve another page's text.
+    """
+    return urldefrag(url.strip())[0]
+
+
+class PersistentCache:
+    """
+    Small SQLite-backed key/value cache with a TTL and LRU eviction.
+
+    Values are stored as JSON. Each operation opens its own connection, so
+    the cache is safe to share between the server's worker threads.
+    """
+
+    def __init__(self, path: Union[str, Path], *, ttl: float, max_entries: int) -> None:
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._ready = False
+        self._init_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Create the directory and table on first use rather than at import
+        if not self._ready:
+            with self._init_lock:
+                if not self._ready:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    conn = sqlite3.connect(self.path, timeout=30)
+                    try:
+                        with conn:
+                            conn.execute(
+                                "CREATE TABLE IF NOT EXISTS cache ("
+                                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                                "created REAL NOT NULL, accessed REAL NOT NULL)"
+                            )
+                            conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+                    finally:
+                        conn.close()
+                    self._ready = True
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute(
+                    "SELECT value, created FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if now - row[1] > self.ttl:
+                    conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    return None
+                conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+            return json.loads(row[0])
+        finally:
+            conn.close()
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), now, now),
+                )
+                conn.execute("DELETE FROM cache WHERE created < ?", (now - self.ttl,))
+                # Evict least recently used entries beyond the size bound
+                conn.execute(
+                    "DELETE FROM cache WHERE key IN ("
+                    "SELECT key FROM cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+        finally:
+            conn.close()
+
+    def clear(self) -> None:
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM cache")
+        finally:
+            conn.close()
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+
+search_cache = PersistentCache(
+    CACHE_DIR / "search.sqlite3",
+    ttl=float(os.getenv("CODEARTISAN_SEARCH_CACHE_TTL", "86400")),
+    max_entries=int(os.getenv("CODEARTISAN_SEARCH_CACHE_SIZE", "2000")),
+)
+
+fetch_cache = PersistentCache(
+    CACHE_DIR / "fetch.sqlite3",
+    ttl=float(os.getenv("CODEARTISAN_FETCH_CACHE_TTL", "86400")),
+    max_entries=int(os.getenv("CODEARTISAN_FETCH_CACHE_SIZE", "500")),
+)